@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_login import LoginManager
 from .config import Config
+from .db import init_db
 from .auth.models import User
 
 login_manager = LoginManager()
@@ -8,10 +9,26 @@ login_manager = LoginManager()
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_db(app)
 
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
+    from .main.cache import init_cache
+    from .main.column_store import init_column_store, verify_column_store_command
+    from .main.indicators import rebuild_indicators_command
+    from .main.jobs import job_queue
+    from .main.metrics import metrics
+    from .main.tickers import init_tickers, rebuild_tickers_command
+    init_cache(app)
+    init_column_store(app)
+    init_tickers(app)
+    job_queue.init_app(app)
+    metrics.init_app(app)
+    app.cli.add_command(rebuild_indicators_command)
+    app.cli.add_command(verify_column_store_command)
+    app.cli.add_command(rebuild_tickers_command)
+
     from .auth.routes import auth_bp
     from .main.routes import main_bp
 
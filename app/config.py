@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()  # loads from .env automatically
@@ -9,4 +10,67 @@ class Config:
     PG_PORT = int(os.environ.get("POSTGRES_PORT", 5432))
     PG_DB   = os.environ.get("POSTGRES_DB", "stocks")
     PG_USER = os.environ.get("POSTGRES_USER", "postgres")
-    PG_PASS = os.environ.get("POSTGRES_PASSWORD", "postgres")
\ No newline at end of file
+    PG_PASS = os.environ.get("POSTGRES_PASSWORD", "postgres")
+
+    # Shared across requests: the psycopg2 pool keeps PG_POOL_SIZE connections
+    # plus up to PG_POOL_MAX_OVERFLOW extra. The SQLAlchemy engine (pandas
+    # read_sql in scripts) holds at most one more. Under gunicorn both default
+    # to a share of PG_CONNECTION_BUDGET (gunicorn.conf.py).
+    PG_POOL_SIZE = int(os.environ.get("PG_POOL_SIZE", 5))
+    PG_POOL_MAX_OVERFLOW = int(os.environ.get("PG_POOL_MAX_OVERFLOW", 10))
+    PG_POOL_RECYCLE = int(os.environ.get("PG_POOL_RECYCLE", 1800))
+    PG_POOL_TIMEOUT = int(os.environ.get("PG_POOL_TIMEOUT", 30))
+
+    # Folder ingestion: parsing fans out over INGEST_WORKERS ("process" or "thread"
+    # executor), DB writes go through at most INGEST_DB_WORKERS connections.
+    INGEST_EXECUTOR = os.environ.get("INGEST_EXECUTOR", "process")
+    INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", os.cpu_count() or 1))
+    INGEST_DB_WORKERS = int(os.environ.get("INGEST_DB_WORKERS", 4))
+    # Files of at least INGEST_STREAM_BYTES skip the parse pool and are parsed
+    # and copied INGEST_CHUNK_ROWS rows at a time by the DB writer.
+    INGEST_STREAM_BYTES = int(os.environ.get("INGEST_STREAM_BYTES", 32 * 1024 * 1024))
+    INGEST_CHUNK_ROWS = int(os.environ.get("INGEST_CHUNK_ROWS", 100_000))
+
+    # Background ingestion jobs: state is shared through a local SQLite file.
+    INGEST_JOBS_DB = os.environ.get("INGEST_JOBS_DB", os.path.join(tempfile.gettempdir(), "stock_ingest_jobs.sqlite3"))
+    INGEST_JOBS_WORKERS = int(os.environ.get("INGEST_JOBS_WORKERS", 2))
+    INGEST_JOBS_TTL = int(os.environ.get("INGEST_JOBS_TTL", 24 * 3600))
+
+    # /chart-data response cache (TTL + LRU), invalidated by ingestion.
+    CHART_CACHE_BACKEND = os.environ.get("CHART_CACHE_BACKEND", "app.main.cache.ChartCache")
+    CHART_CACHE_SIZE = int(os.environ.get("CHART_CACHE_SIZE", 256))
+    CHART_CACHE_TTL = int(os.environ.get("CHART_CACHE_TTL", 300))
+
+    # /export streams query results through a server-side cursor in chunks of
+    # EXPORT_CHUNK_ROWS rows (one Arrow record batch / Parquet row group each).
+    EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 50_000))
+
+    # /chart-data/batch: at most CHART_BATCH_MAX_SPECS specs, built on up to
+    # CHART_BATCH_WORKERS threads from one shared fetch.
+    CHART_BATCH_MAX_SPECS = int(os.environ.get("CHART_BATCH_MAX_SPECS", 50))
+    CHART_BATCH_WORKERS = int(os.environ.get("CHART_BATCH_WORKERS", 4))
+
+    # Optional read-through store of memory-mapped per-label columns that
+    # /chart-data slices instead of querying Postgres; empty disables it.
+    # Least recently read labels are evicted past COLUMN_STORE_MAX_BYTES.
+    COLUMN_STORE_DIR = os.environ.get("COLUMN_STORE_DIR", "")
+    COLUMN_STORE_MAX_BYTES = int(os.environ.get("COLUMN_STORE_MAX_BYTES", 1024 * 1024 * 1024))
+
+    # Moving-average parameter sweeps and portfolio backtests fan out over a
+    # process pool per web process (gunicorn.conf.py splits the CPUs between
+    # workers).
+    SWEEP_WORKERS = int(os.environ.get("SWEEP_WORKERS", os.cpu_count() or 1))
+    SWEEP_MAX_WINDOWS = int(os.environ.get("SWEEP_MAX_WINDOWS", 500))
+
+    # /charts ticker list (tickers table), cached per process; ingestion here
+    # invalidates it, other processes pick changes up within the TTL.
+    TICKER_CACHE_TTL = int(os.environ.get("TICKER_CACHE_TTL", 60))
+
+    # Instrumentation: /metrics accepts METRICS_TOKEN as a bearer token (or a
+    # logged-in session); ?profile=1 returns a profile to ADMIN_USERS only.
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+    ADMIN_USERS = tuple(u.strip() for u in os.environ.get("ADMIN_USERS", "").split(",") if u.strip())
+
+    # Rolling-average windows precomputed into stock_indicators at ingest time;
+    # other windows are computed per request.
+    INDICATOR_WINDOWS = tuple(int(w) for w in os.environ.get("INDICATOR_WINDOWS", "5,10,20,50,100,200").split(",") if w.strip())
@@ -1,11 +1,154 @@
-import psycopg2
+import io
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+from psycopg2.extensions import DECIMAL, new_type, register_type
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from sqlalchemy import create_engine
 from flask import current_app
 
-def get_db_connection():
-    return psycopg2.connect(
-        host=current_app.config['PG_HOST'],
-        dbname=current_app.config['PG_DB'],
-        user=current_app.config['PG_USER'],
-        password=current_app.config['PG_PASS'],
-        port=current_app.config['PG_PORT']
+
+# NUMERIC values (columns not yet migrated, numeric aggregates) are read as
+# float instead of Decimal, so frames get float64 columns, not object ones.
+DEC2FLOAT = new_type(DECIMAL.values, 'DEC2FLOAT', lambda value, cur: float(value) if value is not None else None)
+
+
+class BoundedConnectionPool(ThreadedConnectionPool):
+    # ThreadedConnectionPool that waits for a free slot instead of raising when
+    # exhausted, opens connections lazily and retires them after `recycle` seconds.
+    # Up to `size` idle connections are kept; `overflow` more are closed on return.
+
+    def __init__(self, size, overflow, recycle, timeout, *args, **kwargs):
+        super().__init__(0, size + overflow, *args, **kwargs)
+        self.minconn = size
+        self.recycle = recycle
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size + overflow)
+        self._opened_at = {}
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        self._opened_at[id(conn)] = time.monotonic()
+        return conn
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"no database connection available after {self.timeout}s")
+        try:
+            conn = super().getconn(key)
+            if conn.closed:
+                super().putconn(conn, close=True)
+                conn = super().getconn(key)
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        opened_at = self._opened_at.get(id(conn))
+        expired = self.recycle > 0 and opened_at is not None and time.monotonic() - opened_at > self.recycle
+        try:
+            super().putconn(conn, key, close or expired)
+        finally:
+            if conn.closed:
+                self._opened_at.pop(id(conn), None)
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.minconn,
+                'max_connections': self.maxconn,
+                'open': len(self._pool) + len(self._used),
+                'in_use': len(self._used),
+                'idle': len(self._pool),
+            }
+
+
+def init_db(app):
+    config = app.config
+    register_type(DEC2FLOAT)
+    # Requests go through the psycopg2 pool; the engine only serves ad-hoc
+    # pandas/SQLAlchemy reads, so it gets a single connection.
+    app.extensions['db_engine'] = create_engine(
+        f"postgresql+psycopg2://{config['PG_USER']}:{config['PG_PASS']}@"
+        f"{config['PG_HOST']}:{config['PG_PORT']}/{config['PG_DB']}",
+        pool_size=1,
+        max_overflow=0,
+        pool_recycle=config['PG_POOL_RECYCLE'],
+        pool_timeout=config['PG_POOL_TIMEOUT'],
+        pool_pre_ping=True,
+    )
+    app.extensions['db_pool'] = make_pool(config)
+
+
+def make_pool(config):
+    return BoundedConnectionPool(
+        config['PG_POOL_SIZE'],
+        config['PG_POOL_MAX_OVERFLOW'],
+        config['PG_POOL_RECYCLE'],
+        config['PG_POOL_TIMEOUT'],
+        host=config['PG_HOST'],
+        dbname=config['PG_DB'],
+        user=config['PG_USER'],
+        password=config['PG_PASS'],
+        port=config['PG_PORT'],
     )
+
+
+def close_db(app):
+    # Run in a preloading server's master before it forks, so no worker
+    # inherits a socket that is also open in the master.
+    app.extensions['db_engine'].dispose()
+    pool = app.extensions['db_pool']
+    if not pool.closed:
+        pool.closeall()
+
+
+def reset_db_after_fork(app):
+    # Run in each forked worker: drop (without closing) anything inherited
+    # and give the worker its own pools.
+    app.extensions['db_engine'].dispose(close=False)
+    app.extensions['db_pool'] = make_pool(app.config)
+
+
+def get_engine():
+    return current_app.extensions['db_engine']
+
+
+@contextmanager
+def get_db_connection():
+    pool = current_app.extensions['db_pool']
+    conn = pool.getconn()
+    try:
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def read_frame(query, params=(), dtype=None, parse_dates=None):
+    # Streams the result through COPY ... TO STDOUT as CSV and parses it with
+    # pandas' C reader: typed columns without building a Python object per
+    # value. Only empty fields are NULL, so a label such as "NA" stays a label.
+    buf = io.BytesIO()
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            sql = cur.mogrify(query, params).decode()
+            cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", buf)
+    buf.seek(0)
+    return pd.read_csv(buf, dtype=dtype, parse_dates=parse_dates, keep_default_na=False, na_values=[""])
+
+
+def pool_stats():
+    engine_pool = get_engine().pool
+    return {
+        'engine': {
+            'size': engine_pool.size(),
+            'checked_in': engine_pool.checkedin(),
+            'checked_out': engine_pool.checkedout(),
+            'overflow': engine_pool.overflow(),
+        },
+        'psycopg2': current_app.extensions['db_pool'].stats(),
+    }
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class ChartCache:
+    # In-process TTL + LRU cache for serialized /chart-data responses. Every entry
+    # remembers the labels and date range it covers so ingestion can drop only
+    # the responses it makes stale. Alternative backends (CHART_CACHE_BACKEND)
+    # implement the same get/set/invalidate/clear/stats interface.
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires'] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def set(self, key, value, labels, start=None, end=None):
+        with self._lock:
+            self._entries[key] = {
+                'value': value,
+                'labels': frozenset(labels),
+                'start': start,
+                'end': end,
+                'expires': time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, label, first=None, last=None):
+        # Drops entries for `label` whose [start, end] overlaps [first, last];
+        # open ends (None) overlap everything. Dates are ISO strings.
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if label in entry['labels']
+                and (first is None or entry['end'] is None or entry['end'] >= first)
+                and (last is None or entry['start'] is None or entry['start'] <= last)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def init_cache(app):
+    backend = import_string(app.config['CHART_CACHE_BACKEND'])
+    app.extensions['chart_cache'] = backend(maxsize=app.config['CHART_CACHE_SIZE'],
+                                            ttl=app.config['CHART_CACHE_TTL'])
+
+
+def get_chart_cache():
+    return current_app.extensions['chart_cache']
+
+
+def invalidate_charts(label, first=None, last=None):
+    cache = current_app.extensions.get('chart_cache')
+    if cache is not None:
+        cache.invalidate(label, first and first.isoformat(), last and last.isoformat())
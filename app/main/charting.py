@@ -0,0 +1,332 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import plotly.graph_objs as go
+from flask import current_app, g
+from app.db import read_frame
+from app.main.column_store import get_column_store, store_chart_frame
+from app.main.downsample import downsample_frame
+from app.main.indicators import head_rows, indicator_windows
+from app.main.metrics import count_rows, merge_timings, timed
+from app.main.signals import finite_or_none, signal_actions
+from app.main.trades import TradeLedger, decision_summary
+from app.main.utils import sanitize_fig
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+CHART_TYPES = ("line", "candlestick")
+CHART_FORMATS = ("plotly", "columnar")
+FRAME_DTYPES = {"close_last": "float64", "open": "float64", "high": "float64", "low": "float64",
+                "stored_avg": "float64", "label": "str"}
+
+
+def load_chart_frame(stocks, start, end, indicator=None):
+    # stocks=None loads every label; indicator=(window, include_current) adds
+    # the precomputed average as stored_avg (NaN where none is stored). With
+    # the column store enabled, named labels are sliced from it instead and
+    # averages are computed from the prices.
+    store = get_column_store()
+    df = None
+    if store is not None and stocks is not None:
+        with timed("store"):
+            df = store_chart_frame(store, stocks, start, end)
+    if df is None:
+        with timed("sql"):
+            df = query_chart_frame(stocks, start, end, indicator)
+    count_rows("chart", len(df))
+    if df.empty:
+        return df
+
+    with timed("prep"):
+        df = df.dropna(subset=["date", "open", "high", "low", "close_last"])
+        df = df.sort_values(["label", "date"])
+        df["date_str"] = df["date"].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def query_chart_frame(stocks, start, end, indicator=None):
+    columns = "p.date, p.close_last, p.open, p.high, p.low, p.label"
+    joins = ""
+    params = []
+
+    if indicator is not None:
+        window, include_current = indicator
+        columns += f", i.{'avg_incl' if include_current else 'avg_excl'} AS stored_avg"
+        joins = """
+            LEFT JOIN stock_indicators i
+                ON i.label = p.label AND i.window_days = %s AND i.date = p.date
+        """
+        params.append(window)
+
+    query = f"""
+        SELECT {columns}
+        FROM stock_prices p {joins}
+        WHERE TRUE
+    """
+
+    if stocks is not None:
+        query += " AND p.label = ANY(%s)"
+        params.append(stocks)
+
+    if start and end:
+        query += " AND p.date BETWEEN %s AND %s"
+        params.extend([start, end])
+    elif start:
+        query += " AND p.date >= %s"
+        params.append(start)
+    elif end:
+        query += " AND p.date <= %s"
+        params.append(end)
+
+    query += " ORDER BY p.date ASC"
+
+    return read_frame(query, params, dtype=FRAME_DTYPES, parse_dates=["date"])
+
+
+def stored_average(s_df, window, include_current):
+    # The precomputed average for this range, or None when the label has not
+    # been indexed for it (e.g. ingested before stock_indicators existed).
+    if "stored_avg" not in s_df:
+        return None
+    avg = s_df["stored_avg"].to_numpy(dtype=float).copy()
+    head = min(head_rows(window, include_current), len(avg))
+    if np.isnan(avg[head:]).any():
+        return None
+    avg[:head] = np.nan
+    return avg
+
+
+def split_labels(df):
+    return dict(list(df.groupby("label", sort=False)))
+
+
+def slice_dates(frame, start=None, end=None):
+    # Rows of one label's date-sorted frame within [start, end].
+    dates = frame["date"].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(start, "us"), "left") if start else 0
+    hi = np.searchsorted(dates, np.datetime64(end, "us"), "right") if end else len(dates)
+    return frame.iloc[lo:hi]
+
+
+def stock_series(groups, stocks, avg_days, include_current):
+    # (stock, frame, window, ledger) per stock with data in groups ({label:
+    # frame}); window is None when no average was requested, ledger also when
+    # the average has no values (window longer than the range), where the old
+    # suggestion list was empty too. avg_days is a positive int (validated by
+    # routes.chart_spec).
+    for stock in stocks:
+        if stock not in groups:
+            continue
+        s_df = groups[stock].copy()
+
+        window = None
+        ledger = None
+        if avg_days:
+            window = avg_days
+            stored = stored_average(s_df, window, include_current)
+            if stored is not None:
+                s_df["avg"] = stored
+            elif include_current:
+                s_df["avg"] = s_df["close_last"].rolling(window=window).mean()
+            else:
+                s_df["avg"] = s_df["close_last"].shift(1).rolling(window=window).mean()
+            avg = s_df["avg"].to_numpy(dtype=float)
+            if np.isfinite(avg).any():
+                actions = signal_actions(s_df["close_last"].to_numpy(dtype=float), avg)
+                ledger = TradeLedger.from_frame(stock, s_df, actions)
+
+        yield stock, s_df, window, ledger
+
+
+def chart_layout(chart_type, stocks, bucketed=False):
+    # Bucketed candlesticks use a date axis so signal annotations, which keep
+    # their daily dates, still line up with the bars.
+    return dict(
+        title=f"{chart_type.capitalize()} Chart for {', '.join(stocks)}",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        xaxis=dict(
+            type="category" if chart_type == "candlestick" and not bucketed else "date",
+            rangeslider={"visible": chart_type == "candlestick"}
+        ),
+        margin=dict(t=60)
+    )
+
+
+def plotly_figure(series, chart_type, stocks, bucketed=False):
+    fig = go.Figure()
+    for stock, s_df, window, _ in series:
+        if chart_type == "line":
+            fig.add_trace(go.Scatter(
+                x=s_df["date_str"],
+                y=s_df["close_last"],
+                mode="lines",
+                name=stock
+            ))
+        else:
+            fig.add_trace(go.Candlestick(
+                x=s_df["date_str"],
+                open=s_df["open"],
+                high=s_df["high"],
+                low=s_df["low"],
+                close=s_df["close_last"],
+                name=stock
+            ))
+        if window:
+            fig.add_trace(go.Scatter(
+                x=s_df["date_str"],
+                y=s_df["avg"],
+                mode="lines",
+                name=f"{stock} Avg {window}d",
+                line=dict(dash="solid")
+            ))
+    fig.update_layout(**chart_layout(chart_type, stocks, bucketed))
+    with timed("sanitize"):
+        return sanitize_fig(fig.to_dict())
+
+
+def column(values):
+    return np.ascontiguousarray(values.to_numpy(dtype=float))
+
+
+def columnar_series(series, chart_type, methods):
+    # One entry per stock: shared x plus float64 columns; the client builds
+    # the Plotly traces.
+    out = []
+    for (stock, s_df, window, _), method in zip(series, methods):
+        entry = {"stock": stock, "x": s_df["date_str"].tolist(), "close": column(s_df["close_last"])}
+        if method:
+            entry["downsampled"] = method
+        if chart_type == "candlestick":
+            entry.update(open=column(s_df["open"]), high=column(s_df["high"]), low=column(s_df["low"]))
+        if window:
+            entry.update(avg=column(s_df["avg"]), avg_name=f"{stock} Avg {window}d")
+        out.append(entry)
+    return out
+
+
+def chart_indicator(avg_days, include_current):
+    if avg_days and str(avg_days).isdigit() and int(avg_days) in indicator_windows():
+        return int(avg_days), bool(include_current)
+    return None
+
+
+def build_chart_payload(stocks, start, end, chart_type, avg_days, include_current, fmt="plotly",
+                        max_points=None):
+    if chart_type not in CHART_TYPES:
+        return {"error": f"Unknown chart type: {chart_type}"}, 400
+
+    df = load_chart_frame(stocks, start, end, chart_indicator(avg_days, include_current))
+    if df.empty:
+        return {"error": "No data found in range."}, 404
+    return chart_payload(split_labels(df), stocks, chart_type, avg_days, include_current, fmt, max_points)
+
+
+def build_batch_payloads(specs, workers=1):
+    # (payload, status) per spec. Every spec is cut from one frame covering
+    # the union of their labels and date ranges, then the specs are built
+    # concurrently; stored averages are joined only when all specs ask for
+    # the same one, otherwise they are computed from the prices.
+    results = [({"error": f"Unknown chart type: {spec['chart_type']}"}, 400)
+               if spec["chart_type"] not in CHART_TYPES else None for spec in specs]
+    pending = [spec for spec, result in zip(specs, results) if result is None]
+    if not pending:
+        return results
+
+    stocks = sorted({stock for spec in pending for stock in spec["stocks"]})
+    starts = [spec["start"] for spec in pending]
+    ends = [spec["end"] for spec in pending]
+    indicators = {chart_indicator(spec["avg_days"], spec["include_current"]) for spec in pending}
+    df = load_chart_frame(stocks, None if None in starts else min(starts), None if None in ends else max(ends),
+                          indicators.pop() if len(indicators) == 1 else None)
+    groups = split_labels(df) if not df.empty else {}
+
+    def build_spec(spec):
+        spec_groups = {}
+        for stock in spec["stocks"]:
+            if stock in groups:
+                frame = slice_dates(groups[stock], spec["start"], spec["end"])
+                if len(frame):
+                    spec_groups[stock] = frame
+        if not spec_groups:
+            return {"error": "No data found in range."}, 404
+        return chart_payload(spec_groups, spec["stocks"], spec["chart_type"], spec["avg_days"],
+                             spec["include_current"], spec["fmt"], spec["max_points"])
+
+    # Each thread gets its own app context so its stage timings can be
+    # handed back to the request.
+    app = current_app._get_current_object()
+
+    def build(spec):
+        with app.app_context():
+            g.timings = {}
+            return build_spec(spec), g.timings
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as executor:
+        built = list(executor.map(build, pending))
+    for _, timings in built:
+        merge_timings(timings)
+    built = iter(payload for payload, _ in built)
+    return [result or next(built) for result in results]
+
+
+def chart_payload(groups, stocks, chart_type, avg_days, include_current, fmt="plotly", max_points=None):
+    with timed("signals"):
+        series = list(stock_series(groups, stocks, avg_days, include_current))
+    ledgers = [ledger for *_, ledger in series if ledger is not None]
+
+    # Trades are paired per stock, so each stock's open position closes on
+    # its own last row.
+    with timed("trades"):
+        default_operation = decision_summary(ledgers)
+        trade_table = [row for ledger in ledgers for row in ledger.trade_table()]
+        trade_summary = [ledger.summary() for ledger in ledgers]
+
+    # Signals above come from full-resolution data; only the plotted series
+    # are reduced to max_points.
+    methods = []
+    plotted = []
+    with timed("downsample"):
+        for stock, s_df, window, ledger in series:
+            s_df, method = downsample_frame(s_df, chart_type, max_points)
+            plotted.append((stock, s_df, window, ledger))
+            methods.append(method)
+    bucketed = chart_type == "candlestick" and any(methods)
+
+    with timed("figure"):
+        if fmt == "columnar":
+            return {
+                "format": "columnar",
+                "chart_type": chart_type,
+                "layout": chart_layout(chart_type, stocks, bucketed),
+                "series": columnar_series(plotted, chart_type, methods),
+                "signals": [row for ledger in ledgers for row in ledger.signals()],
+                "default_operation": default_operation,
+                "trade_table": trade_table,
+                "trade_summary": trade_summary
+            }, 200
+
+        return {
+            "plotly_figure": plotly_figure(plotted, chart_type, stocks, bucketed),
+            "suggestions": [row for ledger in ledgers for row in ledger.suggestions()],
+            "default_operation": default_operation,
+            "trade_table": trade_table,
+            "trade_summary": trade_summary
+        }, 200
+
+
+def encode_default(obj):
+    if isinstance(obj, np.ndarray):
+        return finite_or_none(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_payload(payload):
+    # orjson writes NaN/inf as null and numpy arrays natively, so no
+    # sanitize pass is needed for columnar payloads.
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=encode_default)
@@ -0,0 +1,302 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+import click
+import numpy as np
+import pandas as pd
+from flask import current_app
+from flask.cli import with_appcontext
+from app.db import get_db_connection, read_frame
+
+# Column files hold raw values back to back; meta.json records how many rows
+# are committed, so readers map exactly that many while an append is writing
+# past them.
+COLUMNS = {
+    "date": "datetime64[us]",
+    "close_last": "float64",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "volume": "int64",
+}
+FORMAT_VERSION = 1
+
+LABEL_ROWS = """
+    SELECT date, close_last, open, high, low, COALESCE(volume, 0) AS volume
+    FROM stock_prices
+    WHERE label = %s AND date > %s
+    ORDER BY date
+"""
+
+
+class ColumnStore:
+    # Read-through, memory-mapped copy of stock_prices per label. Filled on
+    # first read, appended to by ingestion (a backfill drops the label so it
+    # is rebuilt on next read) and trimmed to max_bytes by evicting the
+    # least recently read labels. Writers serialize on a per-label flock, so
+    # several processes can share one directory.
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._stats_lock = threading.Lock()
+        self.hits = self.misses = self.appends = self.drops = self.evictions = 0
+
+    def count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def path(self, label, *parts):
+        return os.path.join(self.root, f"{quote(label, safe='')}.cols", *parts)
+
+    @contextmanager
+    def lock(self, label):
+        with open(os.path.join(self.root, f"{quote(label, safe='')}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def meta(self, label):
+        try:
+            with open(self.path(label, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("version") == FORMAT_VERSION else None
+
+    def write_meta(self, directory, meta):
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+
+    def columns(self, label):
+        # Memory-mapped columns of the label, loading it from Postgres on a
+        # miss; None when the label has no rows.
+        meta = self.meta(label)
+        if meta is None:
+            self.count("misses")
+            meta = self.populate(label)
+            if meta is None:
+                return None
+        else:
+            self.count("hits")
+        try:
+            arrays = {name: np.memmap(self.path(label, name), dtype=dtype, mode="r", shape=(meta["rows"],))
+                      for name, dtype in COLUMNS.items()}
+            os.utime(self.path(label, "meta.json"))
+        except (OSError, ValueError):
+            # Evicted or dropped between reading meta and mapping.
+            return None
+        return arrays
+
+    def slice(self, label, start=None, end=None):
+        # Views of the rows with start <= date <= end, found by binary search
+        # over the sorted date column; nothing is copied.
+        arrays = self.columns(label)
+        if arrays is None:
+            return None
+        dates = arrays["date"]
+        lo = np.searchsorted(dates, np.datetime64(start, "us"), "left") if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, "us"), "right") if end else len(dates)
+        return {name: values[lo:hi] for name, values in arrays.items()}
+
+    def fetch(self, label, after=None):
+        return read_frame(LABEL_ROWS, (label, after or "-infinity"), dtype={
+            name: dtype for name, dtype in COLUMNS.items() if name != "date"
+        }, parse_dates=["date"])
+
+    def populate(self, label):
+        with self.lock(label):
+            meta = self.meta(label)
+            if meta is not None:
+                return meta
+            df = self.fetch(label)
+            if df.empty:
+                return None
+            staging = tempfile.mkdtemp(dir=self.root, prefix=".staging-")
+            try:
+                for name, dtype in COLUMNS.items():
+                    df[name].to_numpy(dtype=dtype).tofile(os.path.join(staging, name))
+                meta = self.new_meta(df)
+                self.write_meta(staging, meta)
+                shutil.rmtree(self.path(label), ignore_errors=True)
+                os.rename(staging, self.path(label))
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+        self.evict(keep=label)
+        return meta
+
+    def new_meta(self, df, rows=0, size=0):
+        return {
+            "version": FORMAT_VERSION,
+            "rows": rows + len(df),
+            "max_date": df["date"].iloc[-1].date().isoformat(),
+            "bytes": size + len(df) * sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values()),
+        }
+
+    def append(self, label, first_date):
+        # Called after ingestion inserted rows from first_date on. Rows past
+        # the stored end are appended; anything earlier is a backfill, and
+        # the label is dropped to be rebuilt on its next read.
+        with self.lock(label):
+            meta = self.meta(label)
+            if meta is None:
+                return
+            if first_date.isoformat() <= meta["max_date"]:
+                self.drop(label)
+                return
+            df = self.fetch(label, meta["max_date"])
+            if df.empty:
+                return
+            for name, dtype in COLUMNS.items():
+                with open(self.path(label, name), "r+b") as f:
+                    # Truncate to the committed rows first, in case an
+                    # earlier append died after writing.
+                    f.truncate(meta["rows"] * np.dtype(dtype).itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(df[name].to_numpy(dtype=dtype).tobytes())
+            self.write_meta(self.path(label), self.new_meta(df, meta["rows"], meta["bytes"]))
+            self.count("appends")
+        self.evict(keep=label)
+
+    def drop(self, label):
+        shutil.rmtree(self.path(label), ignore_errors=True)
+        self.count("drops")
+
+    def labels(self):
+        # (last read, bytes, label) for every stored label.
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".cols"):
+                continue
+            label = unquote(entry.name[:-len(".cols")])
+            try:
+                with open(os.path.join(entry.path, "meta.json")) as f:
+                    size = json.load(f)["bytes"]
+                entries.append((os.stat(os.path.join(entry.path, "meta.json")).st_mtime, size, label))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
+
+    def evict(self, keep=None):
+        entries = sorted(self.labels())
+        total = sum(size for _, size, _ in entries)
+        for _, size, label in entries:
+            if total <= self.max_bytes:
+                break
+            if label == keep:
+                continue
+            with self.lock(label):
+                self.drop(label)
+            total -= size
+            self.count("evictions")
+
+    def verify(self, label):
+        # Compares row count, date span and column sums with Postgres;
+        # returns the mismatching fields (empty when consistent).
+        arrays = self.columns(label)
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT COUNT(*), MIN(date), MAX(date), SUM(close_last), SUM(open), SUM(high), SUM(low),
+                           SUM(COALESCE(volume, 0))
+                    FROM stock_prices WHERE label = %s
+                """, (label,))
+                rows, first, last, *sums = cur.fetchone()
+        if arrays is None:
+            return ["rows"] if rows else []
+        local = [len(arrays["date"])]
+        if local[0]:
+            local += [str(arrays["date"][0])[:10], str(arrays["date"][-1])[:10]]
+        remote = [rows] + ([first.isoformat(), last.isoformat()] if rows else [])
+        names = ["rows", "first_date", "last_date"]
+        mismatched = [name for name, a, b in zip(names, local, remote) if a != b]
+        if mismatched:
+            return mismatched
+        for name, remote_sum in zip(["close_last", "open", "high", "low", "volume"], sums):
+            if not np.isclose(float(np.nansum(arrays[name])), float(remote_sum or 0), rtol=1e-9):
+                mismatched.append(name)
+        return mismatched
+
+    def stats(self):
+        entries = self.labels()
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "labels": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "appends": self.appends,
+                "drops": self.drops,
+                "evictions": self.evictions,
+            }
+
+
+def init_column_store(app):
+    root = app.config["COLUMN_STORE_DIR"]
+    app.extensions["column_store"] = ColumnStore(root, app.config["COLUMN_STORE_MAX_BYTES"]) if root else None
+
+
+def get_column_store():
+    return current_app.extensions.get("column_store")
+
+
+def store_chart_frame(store, stocks, start, end):
+    # load_chart_frame's price columns read from the store, or None when a
+    # date cannot be parsed (the SQL path reports it as before).
+    try:
+        bounds = [np.datetime64(d, "D") if d else None for d in (start, end)]
+    except ValueError:
+        return None
+    frames = []
+    for label in sorted(set(stocks)):
+        columns = store.slice(label, *bounds)
+        if columns is None or not len(columns["date"]):
+            continue
+        frame = pd.DataFrame({name: columns[name] for name in ("date", "close_last", "open", "high", "low")},
+                             copy=False)
+        frame["label"] = pd.Series(label, index=frame.index, dtype="str")
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def refresh_column_store(label, first_date):
+    store = get_column_store()
+    if store is not None:
+        store.append(label, first_date)
+
+
+@click.command("verify-column-store")
+@click.option("--drop", is_flag=True, help="Drop labels that differ from Postgres.")
+@with_appcontext
+def verify_column_store_command(drop):
+    """Check every stored label against Postgres."""
+    store = get_column_store()
+    if store is None:
+        raise click.ClickException("COLUMN_STORE_DIR is not set.")
+    labels = [label for _, _, label in store.labels()]
+    bad = 0
+    for label in labels:
+        mismatched = store.verify(label)
+        if mismatched:
+            bad += 1
+            click.echo(f"{label}: differs in {', '.join(mismatched)}" + (" (dropped)" if drop else ""))
+            if drop:
+                with store.lock(label):
+                    store.drop(label)
+    click.echo(f"{bad} of {len(labels)} labels differ")
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Candlestick bucket sizes tried in order until the series fits in max_points.
+OHLC_PERIODS = ("W", "M", "Q", "Y")
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from
+    # each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the average of the next bucket.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(int) + 1
+    edges[-1] = n - 1
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def lttb_frame(s_df, max_points, value_col="close_last"):
+    # Rows chosen by LTTB on the price; the average column rides along so all
+    # columns keep sharing one x axis.
+    values = s_df[value_col].to_numpy(dtype=float)
+    if len(values) <= max_points or not np.isfinite(values).all():
+        return s_df
+    x = s_df["date"].to_numpy(dtype="datetime64[D]").astype(float)
+    return s_df.iloc[lttb_indices(x, values, max_points)]
+
+
+def ohlc_frame(s_df, max_points):
+    # Weekly, monthly, quarterly or yearly bars (first one that fits); each bar
+    # is dated by its first trading day. Returns (frame, period).
+    for period in OHLC_PERIODS:
+        buckets = s_df["date"].dt.to_period(period)
+        if buckets.nunique() <= max_points:
+            break
+    agg = {"date": "first", "date_str": "first", "open": "first", "high": "max",
+           "low": "min", "close_last": "last", "label": "first"}
+    if "avg" in s_df:
+        agg["avg"] = "last"
+    return s_df.groupby(buckets.to_numpy(), sort=True).agg(agg).reset_index(drop=True), period
+
+
+def downsample_frame(s_df, chart_type, max_points):
+    # Returns (frame, method); method is None when the series is returned as
+    # is (it already fits, or LTTB skipped it for gaps in the prices).
+    if not max_points or len(s_df) <= max_points:
+        return s_df, None
+    if chart_type == "candlestick":
+        frame, period = ohlc_frame(s_df, max_points)
+        return frame, f"ohlc-{period}"
+    frame = lttb_frame(s_df, max_points)
+    return frame, "lttb" if frame is not s_df else None
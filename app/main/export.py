@@ -0,0 +1,130 @@
+import csv
+import io
+from app.db import get_db_connection
+from app.main.metrics import count_rows
+from app.main.utils import GRID_COLUMNS
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def load_pyarrow():
+    # Imported on first use: pyarrow is large and only the bulk export needs it.
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def price_query(stocks, start, end):
+    # stocks=None exports every label. Ordered by the (label, date) primary
+    # key, so rows stream out of the index without a sort.
+    conditions, params = [], []
+    if stocks is not None:
+        conditions.append("label = ANY(%s)")
+        params.append(stocks)
+    if start:
+        conditions.append("date >= %s")
+        params.append(start)
+    if end:
+        conditions.append("date <= %s")
+        params.append(end)
+    query = f"SELECT {', '.join(GRID_COLUMNS)} FROM stock_prices"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query + " ORDER BY label, date", params
+
+
+def search_query(where_clause, params):
+    # The index grid's result set for a parse_search() filter, in its default order.
+    return f"SELECT {', '.join(GRID_COLUMNS)} FROM stock_prices {where_clause} ORDER BY date DESC, label ASC", params
+
+
+def fetch_chunks(query, params, chunk_rows):
+    # A named (server-side) cursor keeps the result set in Postgres and
+    # fetches it chunk_rows at a time, so memory does not grow with the range.
+    with get_db_connection() as conn:
+        with conn.cursor(name="export") as cur:
+            cur.itersize = chunk_rows
+            cur.execute(query, params)
+            while rows := cur.fetchmany(chunk_rows):
+                count_rows("export", len(rows))
+                yield rows
+
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file that hands its contents out on drain(). Unlike a
+    # truncated BytesIO, tell() keeps counting, which Parquet needs for the
+    # offsets in its footer.
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def arrow_schema(pa):
+    return pa.schema([
+        ("date", pa.date32()),
+        ("close_last", pa.float64()),
+        ("volume", pa.int64()),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("label", pa.string()),
+    ])
+
+
+def encode_arrow(chunks, fmt):
+    # One record batch (Arrow IPC stream) or row group (Parquet) per chunk,
+    # yielded as soon as it is encoded.
+    pa = load_pyarrow()
+    schema = arrow_schema(pa)
+    sink = ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pa.parquet.ParquetWriter(sink, schema)
+    with writer:
+        for rows in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def encode_csv(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(GRID_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+def stream_export(query, params, fmt, chunk_rows):
+    chunks = fetch_chunks(query, params, chunk_rows)
+    return encode_csv(chunks) if fmt == "csv" else encode_arrow(chunks, fmt)
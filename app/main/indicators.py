@@ -0,0 +1,88 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.db import get_db_connection
+
+# Rows the charts use: load_chart_frame drops rows missing any of these.
+VALID_ROW = "close_last IS NOT NULL AND open IS NOT NULL AND high IS NOT NULL AND low IS NOT NULL"
+
+
+def indicator_windows():
+    return current_app.config.get("INDICATOR_WINDOWS", ())
+
+
+def head_rows(window, include_current):
+    # Leading rows of any fetched range whose on-the-fly rolling average is
+    # NaN; the stored averages for those rows are masked to match.
+    return window - 1 if include_current else window
+
+
+def refresh_sql(windows):
+    # One statement per label: both averages for every stored window from
+    # %(first)s onward, reading back just enough history for the widest
+    # window. An average is only defined over a full window of rows.
+    columns, frames, values = [], [], []
+    for window in windows:
+        for suffix, frame in (("incl", f"ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW"),
+                              ("excl", f"ROWS BETWEEN {window} PRECEDING AND 1 PRECEDING")):
+            name = f"w{window}_{suffix}"
+            frames.append(f"{name} AS (ORDER BY date {frame})")
+            columns.append(f"CASE WHEN COUNT(close_last) OVER {name} = {window} "
+                           f"THEN (AVG(close_last) OVER {name})::double precision END AS {name}")
+        values.append(f"({window}, a.w{window}_incl, a.w{window}_excl)")
+    return f"""
+        WITH history AS (
+            SELECT COALESCE(MIN(date), %(first)s) AS since
+            FROM (
+                SELECT date FROM stock_prices
+                WHERE label = %(label)s AND date < %(first)s AND {VALID_ROW}
+                ORDER BY date DESC
+                LIMIT {max(windows)}
+            ) t
+        ), averages AS (
+            SELECT date, {', '.join(columns)}
+            FROM stock_prices
+            WHERE label = %(label)s AND date >= (SELECT since FROM history) AND {VALID_ROW}
+            WINDOW {', '.join(frames)}
+        )
+        INSERT INTO stock_indicators (label, window_days, date, avg_incl, avg_excl)
+        SELECT %(label)s, v.window_days, a.date, v.avg_incl, v.avg_excl
+        FROM averages a
+        CROSS JOIN LATERAL (VALUES {', '.join(values)}) v(window_days, avg_incl, avg_excl)
+        WHERE a.date >= %(first)s AND (v.avg_incl IS NOT NULL OR v.avg_excl IS NOT NULL)
+    """
+
+
+def refresh_indicators(cur, label, first, windows=None):
+    # New rows shift every later window, so everything from the earliest
+    # inserted date onward is recomputed; earlier rows are untouched.
+    windows = indicator_windows() if windows is None else windows
+    if not windows:
+        return 0
+    # Serializes refreshes of one label until commit, so a concurrent ingest
+    # recomputes with this transaction's rows visible.
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"stock_indicators:{label}",))
+    cur.execute("DELETE FROM stock_indicators WHERE label = %s AND date >= %s", (label, first))
+    cur.execute(refresh_sql(windows), {"label": label, "first": first})
+    return cur.rowcount
+
+
+def rebuild_indicators(cur, labels=None, windows=None):
+    windows = indicator_windows() if windows is None else windows
+    if labels is None:
+        cur.execute("SELECT DISTINCT label FROM stock_prices ORDER BY label")
+        labels = [row[0] for row in cur.fetchall()]
+    cur.execute("DELETE FROM stock_indicators WHERE label = ANY(%s)", (list(labels),))
+    return sum(refresh_indicators(cur, label, "-infinity", windows) for label in labels)
+
+
+@click.command("rebuild-indicators")
+@click.argument("labels", nargs=-1)
+@with_appcontext
+def rebuild_indicators_command(labels):
+    """Recompute stock_indicators for LABELS (default: every label)."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            rows = rebuild_indicators(cur, [label.upper() for label in labels] or None)
+        conn.commit()
+    click.echo(f"Stored {rows} indicator rows for windows {', '.join(map(str, indicator_windows()))}.")
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from flask import current_app
+import pandas as pd
+from app.main.manifest import plan_files, touch_file
+from app.main.metrics import count_rows, metrics, timed
+from app.main.utils import extract_file_base_name, file_label, parse_csv_stream, insert_batches
+
+
+def read_and_parse(filepath):
+    return pd.concat(parse_csv_stream(filepath), ignore_index=True)
+
+
+def file_size(filepath):
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
+
+def make_parse_executor(kind, workers):
+    if kind == 'process':
+        # spawn: forking a threaded web worker can inherit held locks
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown ingest executor: {kind}")
+
+
+def ingest_files(filepaths, executor=None, workers=None, db_workers=None, progress=None, sources=None, force=False):
+    # `sources` name the files in the ingest manifest (default: their paths);
+    # `force` loads every file whole even if the manifest has seen it.
+    config = current_app.config
+    app = current_app._get_current_object()
+    executor = executor or config['INGEST_EXECUTOR']
+    workers = max(1, workers or config['INGEST_WORKERS'])
+    db_workers = max(1, db_workers or config['INGEST_DB_WORKERS'])
+    stream_bytes = config['INGEST_STREAM_BYTES']
+    chunk_rows = config['INGEST_CHUNK_ROWS']
+
+    file_names = [extract_file_base_name(filepath) for filepath in filepaths]
+    sources = sources or [os.path.abspath(filepath) for filepath in filepaths]
+    plans = plan_files(filepaths, sources, [file_label(name) for name in file_names], force)
+    results = [None] * len(filepaths)
+    report_lock = threading.Lock()
+
+    def report(index, result):
+        results[index] = result
+        metrics.inc("ingest_files_total", status=result['status'])
+        if progress:
+            with report_lock:
+                progress(result)
+    # Caps files that are parsed (or parsing) but not yet written, so parsed
+    # frames cannot pile up in memory when the database is the bottleneck.
+    in_flight = threading.BoundedSemaphore(workers + 2 * db_workers)
+
+    def write(index, df=None, filepath=None):
+        # Large files are parsed here chunk by chunk while they are copied in,
+        # instead of being parsed whole by a parse worker first.
+        file_name = file_names[index]
+        _, entry, since = plans[index]
+        try:
+            batches = [df] if filepath is None else parse_csv_stream(filepath, chunk_rows)
+            with app.app_context(), timed("ingest_copy"):
+                inserted, skipped, rows = insert_batches(batches, file_name, since, entry)
+            count_rows("ingest_read", rows)
+            count_rows("ingest_inserted", inserted)
+            report(index, {'file': file_name, 'rows': rows, 'delta_rows': inserted + skipped,
+                           'inserted': inserted, 'skipped': skipped, 'status': 'ok'})
+        except Exception as e:
+            report(index, {'file': file_name, 'error': str(e), 'status': 'fail'})
+        finally:
+            in_flight.release()
+
+    with make_parse_executor(executor, workers) as parsers, \
+            ThreadPoolExecutor(max_workers=db_workers) as writers:
+        parsing = {}
+        writes = []
+
+        def collect(done):
+            for future in done:
+                index = parsing.pop(future)
+                try:
+                    df = future.result()
+                except Exception as e:
+                    report(index, {'file': file_names[index], 'error': str(e), 'status': 'fail'})
+                    in_flight.release()
+                    continue
+                writes.append(writers.submit(write, index, df))
+
+        for index, filepath in enumerate(filepaths):
+            action, entry, _ = plans[index]
+            if action == 'skip':
+                if entry:
+                    touch_file(entry)
+                report(index, {'file': file_names[index], 'rows': 0, 'delta_rows': 0, 'inserted': 0,
+                               'skipped': 0, 'status': 'skipped'})
+                continue
+            while not in_flight.acquire(timeout=0.1):
+                done, _ = wait(parsing, timeout=0, return_when=FIRST_COMPLETED)
+                collect(done)
+            if file_size(filepath) >= stream_bytes:
+                writes.append(writers.submit(write, index, filepath=filepath))
+            else:
+                parsing[parsers.submit(read_and_parse, filepath)] = index
+        while parsing:
+            done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+            collect(done)
+        wait(writes)
+
+    return results
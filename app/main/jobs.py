@@ -0,0 +1,215 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.main.ingest import ingest_files
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    files_total INTEGER NOT NULL,
+    files_done INTEGER NOT NULL DEFAULT 0,
+    rows_total INTEGER NOT NULL DEFAULT 0,
+    rows_inserted INTEGER NOT NULL DEFAULT 0,
+    files_skipped INTEGER NOT NULL DEFAULT 0,
+    rows_delta INTEGER NOT NULL DEFAULT 0,
+    errors TEXT NOT NULL DEFAULT '[]',
+    results TEXT NOT NULL DEFAULT '[]',
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+# Columns added after the table was first created; the file outlives upgrades.
+ADDED_COLUMNS = {
+    'files_skipped': "INTEGER NOT NULL DEFAULT 0",
+    'rows_delta': "INTEGER NOT NULL DEFAULT 0",
+    'owner': "TEXT",
+    'spool': "TEXT",
+}
+
+NOT_STARTED = 'Server shut down before the job started.'
+INTERRUPTED = 'Server worker exited before the job finished; upload again to load the remaining files.'
+
+
+def process_token(pid):
+    # The pid plus, where /proc has it, the process start time, so a reused
+    # pid (a restarted container) does not pass for the job's owner.
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f"{pid}:{f.read().rsplit(')', 1)[1].split()[19]}"
+    except (OSError, IndexError):
+        return str(pid)
+
+
+def owner_alive(owner):
+    if not owner:
+        return False
+    pid = int(owner.split(':')[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return process_token(pid) == owner
+
+
+class JobQueue:
+    # Ingestion jobs run on in-process worker threads; their state lives in a
+    # SQLite file so any web worker on the host can report progress.
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pending = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.path = app.config['INGEST_JOBS_DB']
+        self.ttl = app.config['INGEST_JOBS_TTL']
+        self.executor = self.make_executor()
+        with self.connect() as conn:
+            conn.execute(SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(ingest_jobs)")}
+            for name, ddl in ADDED_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE ingest_jobs ADD COLUMN {name} {ddl}")
+        self.reconcile()
+        app.extensions['ingest_jobs'] = self
+
+    def make_executor(self):
+        return ThreadPoolExecutor(max_workers=self.app.config['INGEST_JOBS_WORKERS'], thread_name_prefix='ingest-job')
+
+    def after_fork(self):
+        # Worker threads do not survive a fork; a forked server worker starts
+        # its own executor. A new worker usually replaces one that exited, so
+        # that one's jobs are settled here too.
+        self.executor = self.make_executor()
+        self.reconcile()
+
+    def reconcile(self):
+        # Fails queued or running jobs whose owning process is gone (killed
+        # mid-job, or exited without finishing them), so clients following
+        # them stop waiting, and removes their uploaded files.
+        with self.lock, self.connect() as conn:
+            rows = conn.execute(
+                "SELECT id, status, owner, spool FROM ingest_jobs WHERE status IN ('queued', 'running')").fetchall()
+            self.fail(conn, [row for row in rows if not owner_alive(row['owner'])])
+
+    def shutdown(self, timeout=None):
+        # Cancels queued jobs and waits up to `timeout` seconds for running
+        # ones, then fails whatever this process has not finished, since it is
+        # about to exit. Returns False if a job was still running.
+        jobs = dict(self.pending)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if not jobs:
+            return True
+        _, running = wait(jobs.values(), timeout=timeout)
+        with self.lock, self.connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, status, spool FROM ingest_jobs WHERE id IN ({','.join('?' * len(jobs))})"
+                " AND status IN ('queued', 'running')", list(jobs)).fetchall()
+            self.fail(conn, rows)
+        return not running
+
+    def fail(self, conn, rows):
+        # rows: the jobs as read (id, status, spool); a job that moved on since
+        # is left alone. Cancelled or abandoned jobs never reach run()'s
+        # cleanup, so their spooled uploads are removed here.
+        now = time.time()
+        for row in rows:
+            error = NOT_STARTED if row['status'] == 'queued' else INTERRUPTED
+            failed = conn.execute("""
+                UPDATE ingest_jobs SET status = 'failed', errors = ?, finished_at = ? WHERE id = ? AND status = ?
+            """, (json.dumps([{'file': None, 'error': error}]), now, row['id'], row['status'])).rowcount
+            if failed and row['spool']:
+                shutil.rmtree(row['spool'], ignore_errors=True)
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, filepaths, cleanup_dir=None, sources=None, force=False):
+        job_id = uuid.uuid4().hex
+        with self.lock, self.connect() as conn:
+            conn.execute("DELETE FROM ingest_jobs WHERE finished_at < ?", (time.time() - self.ttl,))
+            conn.execute("""
+                INSERT INTO ingest_jobs (id, status, files_total, created_at, owner, spool)
+                VALUES (?, 'queued', ?, ?, ?, ?)
+            """, (job_id, len(filepaths), time.time(), process_token(os.getpid()), cleanup_dir))
+        future = self.executor.submit(self.run, job_id, filepaths, cleanup_dir, sources, force)
+        self.pending[job_id] = future
+        future.add_done_callback(lambda _: self.pending.pop(job_id, None))
+        return job_id
+
+    def run(self, job_id, filepaths, cleanup_dir, sources=None, force=False):
+        self.update("UPDATE ingest_jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                    (time.time(), job_id))
+
+        def progress(result):
+            with self.lock, self.connect() as conn:
+                row = conn.execute("SELECT errors FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+                errors = json.loads(row['errors'])
+                if result['status'] == 'fail':
+                    errors.append({'file': result['file'], 'error': result['error']})
+                conn.execute("""
+                    UPDATE ingest_jobs
+                    SET files_done = files_done + 1, rows_total = rows_total + ?,
+                        rows_inserted = rows_inserted + ?, files_skipped = files_skipped + ?,
+                        rows_delta = rows_delta + ?, errors = ?
+                    WHERE id = ?
+                """, (result.get('rows', 0), result.get('inserted', 0), int(result['status'] == 'skipped'),
+                      result.get('delta_rows', 0), json.dumps(errors), job_id))
+
+        try:
+            with self.app.app_context():
+                results = ingest_files(filepaths, progress=progress, sources=sources, force=force)
+            self.update("""
+                UPDATE ingest_jobs SET status = 'done', results = ?, finished_at = ? WHERE id = ? AND status = 'running'
+            """, (json.dumps(results), time.time(), job_id))
+        except Exception as e:
+            self.app.logger.exception("Ingestion job %s failed", job_id)
+            self.update("""
+                UPDATE ingest_jobs SET status = 'failed', errors = ?, finished_at = ? WHERE id = ? AND status = 'running'
+            """, (json.dumps([{'file': None, 'error': str(e)}]), time.time(), job_id))
+        finally:
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+    def update(self, sql, params):
+        with self.lock, self.connect() as conn:
+            conn.execute(sql, params)
+
+    def get(self, job_id):
+        with self.connect() as conn:
+            row = conn.execute("SELECT * FROM ingest_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        del job['spool']  # a server path, not for clients
+        job['errors'] = json.loads(job['errors'])
+        job['results'] = json.loads(job['results'])
+        elapsed = (job['finished_at'] or time.time()) - job['started_at'] if job['started_at'] else 0
+        job['elapsed'] = round(elapsed, 2)
+        job['rows_per_sec'] = round(job['rows_total'] / elapsed, 1) if elapsed > 0 else 0
+        return job
+
+
+job_queue = JobQueue()
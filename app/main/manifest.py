@@ -0,0 +1,94 @@
+import hashlib
+import os
+from app.db import get_db_connection
+
+HASH_BLOCK = 1024 * 1024
+
+
+def file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(sources, labels):
+    # Manifest rows for these sources, plus the content hashes already
+    # ingested for these labels (a renamed or re-uploaded copy is unchanged).
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT path, size, mtime, sha256 FROM ingest_manifest WHERE path = ANY(%s)",
+                        (list(sources),))
+            known = {path: (size, mtime, sha256) for path, size, mtime, sha256 in cur.fetchall()}
+            cur.execute("SELECT DISTINCT label, sha256 FROM ingest_manifest WHERE label = ANY(%s)",
+                        (list(labels),))
+            hashes = set(cur.fetchall())
+    return known, hashes
+
+
+def label_watermarks(labels):
+    # Latest stored date per label; one backward primary-key probe each.
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT l.label, (SELECT MAX(date) FROM stock_prices p WHERE p.label = l.label)
+                FROM unnest(%s::text[]) AS l(label)
+            """, (list(labels),))
+            return dict(cur.fetchall())
+
+
+def plan_files(filepaths, sources, labels, force=False):
+    # Sorts files into unchanged (skipped), changed (loaded from the label's
+    # high-water mark on) and new (loaded whole). Unchanged means the same
+    # size and mtime as recorded for the source, or a content hash already
+    # ingested for the label. Returns one (action, entry, since) per file;
+    # entry is what record_file stores once the rows are in.
+    known, hashes = load_manifest(sources, labels)
+    plans = []
+    for filepath, source, label in zip(filepaths, sources, labels):
+        try:
+            stat = os.stat(filepath)
+            entry = {'path': source, 'label': label, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        except OSError:
+            # Reported by the parser like any other unreadable file.
+            plans.append(('load', None, None))
+            continue
+        previous = known.get(source)
+        if not force and previous and previous[:2] == (entry['size'], entry['mtime']):
+            plans.append(('skip', None, None))
+            continue
+        entry['sha256'] = file_digest(filepath)
+        if not force and (label, entry['sha256']) in hashes:
+            plans.append(('skip', entry, None))
+        else:
+            plans.append(('load' if force or previous is None else 'delta', entry, None))
+    changed = {entry['label'] for action, entry, _ in plans if action == 'delta'}
+    if changed:
+        watermarks = label_watermarks(changed)
+        plans = [(action, entry, watermarks.get(entry['label']) if action == 'delta' else since)
+                 for action, entry, since in plans]
+    return plans
+
+
+UPSERT_SQL = """
+    INSERT INTO ingest_manifest (path, label, size, mtime, sha256, max_date, ingested_at)
+    VALUES (%(path)s, %(label)s, %(size)s, %(mtime)s, %(sha256)s,
+            (SELECT MAX(date) FROM stock_prices WHERE label = %(label)s), now())
+    ON CONFLICT (path) DO UPDATE SET
+        label = EXCLUDED.label, size = EXCLUDED.size, mtime = EXCLUDED.mtime,
+        sha256 = EXCLUDED.sha256, max_date = EXCLUDED.max_date, ingested_at = EXCLUDED.ingested_at
+"""
+
+
+def record_file(cur, entry):
+    cur.execute(UPSERT_SQL, entry)
+
+
+def touch_file(entry):
+    # A skipped file whose stat changed (e.g. a re-upload): record the new
+    # size and mtime so the next run skips it without hashing.
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            record_file(cur, entry)
+        conn.commit()
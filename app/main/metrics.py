@@ -0,0 +1,165 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from flask_login import current_user
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional; cProfile stats are reported otherwise
+    Profiler = None
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency by endpoint."),
+    "stage_duration_seconds": ("histogram", "Time spent per instrumented stage."),
+    "rows_processed_total": ("counter", "Rows read, loaded or written per stage."),
+    "ingest_files_total": ("counter", "Ingested files by outcome."),
+}
+
+
+class Metrics:
+    # In-process histograms and counters, rendered in the Prometheus text
+    # format by /metrics. Each web process keeps its own, so a scraper sees
+    # one process per scrape.
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(lambda: [[0] * len(BUCKETS), 0.0, 0])
+        self._counters = defaultdict(float)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(start_request)
+        app.after_request(finish_request)
+        app.extensions['metrics'] = self
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            buckets, _, _ = entry = self._histograms[key]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def render(self, gauges=()):
+        # gauges: (name, help, {labels tuple: value}) read at scrape time.
+        with self._lock:
+            histograms = {key: (list(b), s, c) for key, (b, s, c) in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        for name, (kind, text) in HELP.items():
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            if kind == "histogram":
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, hits in zip(BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {hits}")
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total:.6f}")
+                    lines.append(f"{name}_count{format_labels(labels)} {count}")
+            else:
+                lines += [f"{name}{format_labels(labels)} {value:g}"
+                          for (metric, labels), value in sorted(counters.items()) if metric == name]
+        for name, text, values in gauges:
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{format_labels(labels)} {value:g}" for labels, value in values.items()]
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def timed(stage):
+    # Adds the block's duration to the stage histogram and, inside a request
+    # (or a context collecting g.timings for one), to its Server-Timing header.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("stage_duration_seconds", elapsed, stage=stage)
+        if has_app_context() and "timings" in g:
+            g.timings[stage] = g.timings.get(stage, 0.0) + elapsed
+
+
+def merge_timings(timings):
+    # Stage timings collected on other threads; stages that ran in parallel
+    # are summed, so they can add up to more than the request's total.
+    if has_app_context() and "timings" in g:
+        for stage, seconds in timings.items():
+            g.timings[stage] = g.timings.get(stage, 0.0) + seconds
+
+
+def count_rows(stage, rows):
+    metrics.inc("rows_processed_total", rows, stage=stage)
+
+
+def is_admin():
+    return (current_user.is_authenticated
+            and current_user.username in current_app.config["ADMIN_USERS"])
+
+
+def start_request():
+    g.request_started = time.perf_counter()
+    g.timings = {}
+    g.profiler = None
+    if request.args.get("profile") == "1" and is_admin():
+        if Profiler is not None:
+            g.profiler = Profiler()
+            g.profiler.start()
+        else:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+
+def finish_request(response):
+    elapsed = time.perf_counter() - g.get("request_started", time.perf_counter())
+    metrics.observe("http_request_duration_seconds", elapsed, endpoint=request.endpoint or "none",
+                    method=request.method, status=str(response.status_code))
+    timings = g.get("timings") or {}
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+        + [f"total;dur={elapsed * 1000:.1f}"])
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        return profile_response(profiler, response)
+    return response
+
+
+def profile_response(profiler, response):
+    # Replaces the body with the profile of producing it. Streamed bodies
+    # are profiled only up to the point the view returned.
+    if Profiler is not None:
+        profiler.stop()
+        report = profiler.output_text(unicode=True, color=False)
+    else:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+        report = out.getvalue()
+    profiled = current_app.response_class(report, mimetype="text/plain")
+    profiled.headers["Server-Timing"] = response.headers["Server-Timing"]
+    profiled.headers["X-Profiled-Status"] = str(response.status_code)
+    return profiled
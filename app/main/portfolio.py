@@ -0,0 +1,138 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from app.main.signals import signal_actions
+from app.main.sweep import discard_executor, get_executor
+from app.main.trades import TradeLedger
+
+TRADING_DAYS = 252
+
+
+def parse_weights(text):
+    # "AAPL:2,MSFT:1"; labels left out weigh 1 before normalising.
+    weights = {}
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        label, _, weight = part.partition(":")
+        weight = float(weight)
+        if not np.isfinite(weight) or weight < 0:
+            raise ValueError(f"Weight for {label} must be a non-negative number.")
+        weights[label.strip()] = weight
+    return weights
+
+
+def position_returns(ledger):
+    # Daily return of following the stock's signals: held from the close of
+    # each entry row to the close of its exit row, flat otherwise. Shorts
+    # return prev/close - 1 per day, so every trade compounds to exactly the
+    # ledger's growth.
+    close = ledger.prices
+    returns = np.zeros(len(close))
+    if len(close) < 2:
+        return returns
+    with np.errstate(divide="ignore", invalid="ignore"):
+        long_returns = close[1:] / close[:-1] - 1
+        short_returns = close[:-1] / close[1:] - 1
+    position = np.zeros(len(close) + 1, dtype=np.int8)
+    direction = np.where(ledger.is_long, 1, -1)
+    np.add.at(position, ledger.entries + 1, direction)
+    np.add.at(position, ledger.exits + 1, -direction)
+    position = np.cumsum(position)[1:-1]
+    returns[1:] = np.where(position > 0, long_returns, np.where(position < 0, short_returns, 0.0))
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def backtest_stock(stock, days, close, window, include_current):
+    series = pd.Series(close)
+    base = series if include_current else series.shift(1)
+    avg = base.rolling(window=window).mean().to_numpy()
+    ledger = TradeLedger(stock, days, close, signal_actions(close, avg), avg=avg)
+    return ledger.summary(), position_returns(ledger)
+
+
+def backtest_chunk(items, window, include_current):
+    # Runs in a worker process: one batch of (stock, days, close).
+    return [(stock, days, *backtest_stock(stock, days, close, window, include_current))
+            for stock, days, close in items]
+
+
+def run_backtests(series_by_stock, window, include_current, workers=None, executor=None):
+    # series_by_stock: {stock: (days, close)} as from sweep.series_from_frame.
+    # Stocks go to the pool in batches so a full-universe run is a few dozen
+    # tasks rather than one per label; a single batch runs in-process.
+    workers = workers or os.cpu_count() or 1
+    items = [(stock, days, close) for stock, (days, close) in series_by_stock.items()]
+    if not items:
+        return []
+    size = -(-len(items) // (workers * 4))
+    batches = [items[i:i + size] for i in range(0, len(items), size)]
+    if len(batches) == 1 or workers == 1:
+        return backtest_chunk(items, window, include_current)
+    executor = executor or get_executor(workers)
+    try:
+        futures = [executor.submit(backtest_chunk, batch, window, include_current) for batch in batches]
+        return [row for future in futures for row in future.result()]
+    except BrokenProcessPool:
+        discard_executor(executor)
+        raise
+
+
+def combine_equity(results, weights):
+    # Each stock starts with its weight of the capital and compounds its own
+    # trades (no rebalancing); the portfolio is the sum of those sleeves on
+    # the union of all trading days, a sleeve staying flat on days its stock
+    # has no row.
+    days = np.unique(np.concatenate([stock_days for _, stock_days, _, _ in results]))
+    deltas = np.zeros(len(days))
+    for stock, stock_days, _, returns in results:
+        sleeve = weights[stock] * np.cumprod(1 + returns)
+        step = np.diff(sleeve, prepend=weights[stock])
+        np.add.at(deltas, np.searchsorted(days, stock_days), step)
+    return days, 1 + np.cumsum(deltas)
+
+
+def portfolio_stats(days, equity):
+    returns = equity[1:] / equity[:-1] - 1 if len(equity) > 1 else np.array([])
+    years = (days[-1] - days[0]) / 365.25 if len(days) > 1 else 0
+    volatility = float(returns.std() * np.sqrt(TRADING_DAYS)) if len(returns) > 1 else None
+    curve = np.concatenate(([1.0], equity))
+    return {
+        "start": str(np.datetime64(int(days[0]), "D")),
+        "end": str(np.datetime64(int(days[-1]), "D")),
+        "days": len(days),
+        "total_return": round(float((equity[-1] - 1) * 100), 2),
+        "cagr": round(float((equity[-1] ** (1 / years) - 1) * 100), 2) if years > 0 and equity[-1] > 0 else None,
+        "volatility": round(volatility * 100, 2) if volatility is not None else None,
+        "sharpe": round(float(returns.mean() * TRADING_DAYS / volatility), 2) if volatility else None,
+        "max_drawdown": round(float((curve / np.maximum.accumulate(curve) - 1).min() * 100), 2),
+    }
+
+
+def build_portfolio(series_by_stock, window, include_current, weights=None, workers=None):
+    results = run_backtests(series_by_stock, window, include_current, workers)
+    if not results:
+        return None
+    weights = weights or {}
+    raw = {stock: weights.get(stock, 1.0) for stock, *_ in results}
+    total = sum(raw.values())
+    if not total:
+        raise ValueError("Weights sum to zero.")
+    normalised = {stock: weight / total for stock, weight in raw.items()}
+
+    days, equity = combine_equity(results, normalised)
+    summaries = [{**summary, "weight": round(normalised[stock], 6)} for stock, _, summary, _ in results]
+    stats = portfolio_stats(days, equity)
+    stats.update(
+        stocks=len(results),
+        trades=sum(s["trades"] for s in summaries),
+        profitable_stocks=sum(s["cumulative_return"] > 0 for s in summaries),
+    )
+    return {
+        "equity": {"x": np.datetime_as_string(days.astype("datetime64[D]"), unit="D").tolist(),
+                   "y": np.round(equity, 6).tolist()},
+        "stats": stats,
+        "stocks": summaries,
+    }
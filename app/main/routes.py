@@ -1,59 +1,114 @@
 import glob
+import json
 import os
-import pandas as pd
-import plotly.graph_objs as go
-from flask import Blueprint, request, render_template, jsonify
-from flask_login import login_required
-from sqlalchemy import create_engine
-from app.main.utils import (
-    extract_file_base_name, parse_csv, insert_data, parse_search, sanitize_fig,
-    generate_suggestions, get_long_decision_summary, clean_suggestions_keep_last_as_sell, analyze_trades
-)
-from flask import current_app
+import re
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from flask import Blueprint, Response, current_app, request, render_template, jsonify, stream_with_context, url_for
+from flask_login import current_user, login_required
+from werkzeug.datastructures import MultiDict
+from app.main.utils import GRID_COLUMNS, grid_page_query, parse_search, safe_float
+from app.main.cache import get_chart_cache
+from app.main.column_store import get_column_store
+from app.main.charting import (CHART_FORMATS, build_batch_payloads, build_chart_payload, dumps_payload,
+                               load_chart_frame)
+from app.main.sweep import MODES as SWEEP_MODES, RANK_KEYS, parse_windows, rank, run_sweep, series_from_frame
+from app.main.portfolio import build_portfolio, parse_weights
+from app.main.export import EXPORT_FORMATS, load_pyarrow, price_query, search_query, stream_export
+from app.main.jobs import job_queue
+from app.main.metrics import metrics, timed
+from app.main.tickers import get_tickers
+from app.db import get_db_connection, pool_stats
 
 main_bp = Blueprint('main', __name__)
 
-def get_engine():
-    return create_engine(
-        f"postgresql+psycopg2://{current_app.config['PG_USER']}:{current_app.config['PG_PASS']}@"
-        f"{current_app.config['PG_HOST']}:{current_app.config['PG_PORT']}/{current_app.config['PG_DB']}"
-    )
+SWEEP_POOL_BROKEN = "A backtest worker exited; the pool has been restarted, try again."
 
 @main_bp.route('/')
 @login_required
 def index():
     search = request.args.get('search', '').strip()
-    engine = get_engine()
-    base_query = """
-        SELECT date, close_last, volume, open, high, low, label
-        FROM stock_prices
-    """
+    return render_template("index.html", columns=GRID_COLUMNS, search=search)
+
+@main_bp.route('/table-data')
+@login_required
+def table_data():
+    # DataTables server-side protocol; `after_date`/`after_label` carry the
+    # keyset cursor of the previous page when paging sequentially.
+    search = request.args.get('search', '').strip()
+    start = max(request.args.get('start', 0, type=int), 0)
+    length = min(max(request.args.get('length', 20, type=int), 1), 500)
+    order_index = request.args.get('order[0][column]', 0, type=int)
+    order_col = GRID_COLUMNS[order_index] if 0 <= order_index < len(GRID_COLUMNS) else 'date'
+    order_dir = request.args.get('order[0][dir]', 'desc')
+    after_date = request.args.get('after_date')
+    after_label = request.args.get('after_label')
+    after = (after_date, after_label) if after_date and after_label is not None else None
+
     where_clause, params = parse_search(search) if search else ("", [])
-    query = base_query + " " + where_clause + " ORDER BY date DESC, label ASC"
-    df = pd.read_sql_query(query, engine, params=tuple(params) if params else ())
-    table_html = df.to_html(classes="table table-striped table-bordered align-middle", index=False, border=0, justify="center")
-    return render_template("index.html", table_html=table_html, search=search)
+    query, query_params = grid_page_query(where_clause, params, order_col, order_dir, start, length, after)
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, query_params)
+            rows = cur.fetchall()
+            records_total = estimate_row_count(cur)
+            if where_clause:
+                cur.execute(f"SELECT COUNT(*) FROM stock_prices {where_clause}", params)
+                records_filtered = cur.fetchone()[0]
+            else:
+                records_filtered = records_total
+
+    data = [
+        [d.isoformat(), safe_float(c), v, safe_float(o), safe_float(h), safe_float(l), label]
+        for d, c, v, o, h, l, label in rows
+    ]
+    return jsonify({
+        'draw': request.args.get('draw', 0, type=int),
+        'recordsTotal': records_total,
+        'recordsFiltered': records_filtered,
+        'data': data,
+    })
+
+def estimate_row_count(cur):
+    # reltuples (summed over partitions) avoids a full COUNT(*) on every page view
+    cur.execute("""
+        SELECT SUM(GREATEST(reltuples, 0))::bigint, BOOL_AND(reltuples < 0)
+        FROM pg_class
+        WHERE relkind = 'r'
+          AND (oid = 'stock_prices'::regclass
+               OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'stock_prices'::regclass))
+    """)
+    estimate, never_analyzed = cur.fetchone()
+    if never_analyzed or not estimate:
+        cur.execute("SELECT COUNT(*) FROM stock_prices")
+        return cur.fetchone()[0]
+    return estimate
 
 @main_bp.route('/upload', methods=['POST'])
 def upload():
     files = request.files.getlist('file')
-    results = []
 
     if files and files[0].filename != '':
         not_csv = [f.filename for f in files if not f.filename.lower().endswith('.csv')]
         if not_csv:
             return jsonify({'error': f"All files must be CSV! These files are not: {', '.join(not_csv)}"}), 400
 
-        for uploaded_file in files:
-            csv_data = uploaded_file.read().decode()
-            file_name = extract_file_base_name(uploaded_file.filename)
-            try:
-                df = parse_csv(csv_data)
-                insert_data(df, file_name)
-                results.append({'file': file_name, 'rows': len(df), 'status': 'ok'})
-            except Exception as e:
-                results.append({'file': file_name, 'error': str(e), 'status': 'fail'})
-        return jsonify({'results': results})
+        # Spool uploads to disk so the job can outlive the request; the
+        # per-file subdirectory keeps the original name, which carries the label.
+        # The manifest knows uploads by their original name.
+        spool_dir = tempfile.mkdtemp(prefix='stock-upload-')
+        csv_files, sources = [], []
+        with timed("upload_save"):
+            for i, uploaded_file in enumerate(files):
+                filepath = os.path.join(spool_dir, str(i), os.path.basename(uploaded_file.filename))
+                os.makedirs(os.path.dirname(filepath))
+                uploaded_file.save(filepath)
+                csv_files.append(filepath)
+                sources.append(f"upload:{uploaded_file.filename}")
+        return enqueue_ingest(csv_files, cleanup_dir=spool_dir, sources=sources)
 
     folder_path = request.form.get('folder_path')
     if folder_path:
@@ -61,148 +116,322 @@ def upload():
         csv_files = [f for f in all_files if f.lower().endswith('.csv')]
         if not csv_files:
             return jsonify({'error': 'No .csv files found in that folder.'}), 400
-
-        for filepath in csv_files:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                csv_data = f.read()
-            file_name = extract_file_base_name(filepath)
-            try:
-                df = parse_csv(csv_data)
-                insert_data(df, file_name)
-                results.append({'file': file_name, 'rows': len(df), 'status': 'ok'})
-            except Exception as e:
-                results.append({'file': file_name, 'error': str(e), 'status': 'fail'})
-        return jsonify({'results': results})
+        return enqueue_ingest(sorted(csv_files))
 
     return jsonify({'error': 'No files or folder path provided.'}), 400
 
+def enqueue_ingest(csv_files, cleanup_dir=None, sources=None):
+    # force=1 re-loads files the ingest manifest would skip or trim.
+    force = request.form.get('force') == '1'
+    job_id = job_queue.submit(csv_files, cleanup_dir=cleanup_dir, sources=sources, force=force)
+    return jsonify({
+        'job_id': job_id,
+        'files': len(csv_files),
+        'status_url': url_for('main.upload_status', job_id=job_id),
+        'events_url': url_for('main.upload_events', job_id=job_id),
+    }), 202
+
+@main_bp.route('/upload/jobs/<job_id>')
+def upload_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+    return jsonify(job)
+
+@main_bp.route('/upload/jobs/<job_id>/events')
+def upload_events(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+
+    def stream():
+        last = None
+        while True:
+            job = job_queue.get(job_id)
+            payload = json.dumps(job)
+            if payload != last:
+                yield f"data: {payload}\n\n"
+                last = payload
+            if job['status'] in ('done', 'failed'):
+                return
+            time.sleep(0.5)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @main_bp.route('/charts')
 @login_required
 def charts():
-    engine = get_engine()
-    with engine.connect() as conn:
-        stock_names = pd.read_sql_query("SELECT DISTINCT label FROM stock_prices ORDER BY label;", conn)
-    return render_template("charts.html", stock_names=stock_names['label'].tolist())
+    return render_template("charts.html", tickers=get_tickers())
+
+@main_bp.route('/tickers')
+@login_required
+def tickers():
+    return jsonify(get_tickers())
+
+def iso_date(text):
+    # "2024-1-5" and "2024-01-05" are the same day (and the same cache entry).
+    m = re.fullmatch(r'(\d{4})-(\d{1,2})-(\d{1,2})', text.strip())
+    if not m:
+        raise ValueError(text)
+    return date(*map(int, m.groups())).isoformat()
+
+def chart_spec(args):
+    # The /chart-data parameters from request.args (or one batch spec) as
+    # build_chart_payload arguments, or an error message. Dates come back as
+    # ISO strings, so cache keys and invalidation bounds compare as dates.
+    stocks = list(dict.fromkeys(s.strip() for s in args.get("stock", "").split(",") if s.strip()))
+    try:
+        start, end = [iso_date(args[name]) if args.get(name) else None for name in ("start", "end")]
+    except ValueError:
+        return None, "Dates must be YYYY-MM-DD."
+    avg_days = (args.get("avg") or "").strip() or None
+    if avg_days is not None:
+        if not avg_days.isdigit() or int(avg_days) < 1:
+            return None, "avg must be a positive integer."
+        avg_days = int(avg_days)
+    spec = {
+        "stocks": stocks,
+        "start": start,
+        "end": end,
+        "chart_type": args.get("type"),
+        "avg_days": avg_days,
+        "include_current": args.get("include") == "1",
+        "fmt": args.get("format", "plotly"),
+        "max_points": args.get("max_points", type=int),
+    }
+
+    if not stocks or not spec["chart_type"]:
+        return None, "Missing required parameters."
+    if spec["include_current"] and not spec["avg_days"]:
+        return None, "Include current requires average_days_back."
+    if spec["fmt"] not in CHART_FORMATS:
+        return None, f"Unknown format: {spec['fmt']}"
+    if spec["max_points"] is not None and spec["max_points"] < 3:
+        return None, "max_points must be at least 3."
+    return spec, None
+
+def chart_cache_key(spec):
+    return ("chart-data", tuple(spec["stocks"]), spec["start"], spec["end"], spec["chart_type"], spec["avg_days"],
+            spec["include_current"], spec["fmt"], spec["max_points"])
 
 @main_bp.route('/chart-data')
 @login_required
 def chart_data():
-    stocks = request.args.get("stock", "").split(",")
-    start = request.args.get("start")
-    end = request.args.get("end")
-    chart_type = request.args.get("type")
-    avg_days = request.args.get("avg")
-    include_current = request.args.get("include") == "1"
+    spec, error = chart_spec(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    cache = get_chart_cache()
+    key = chart_cache_key(spec)
+    body = cache.get(key)
+    if body is None:
+        payload, status = build_chart_payload(**spec)
+        with timed("encode"):
+            body = dumps_payload(payload)
+        if status != 200:
+            return current_app.response_class(body, status=status, mimetype="application/json")
+        cache.set(key, body, spec["stocks"], spec["start"], spec["end"])
+    return current_app.response_class(body, mimetype="application/json")
 
-    if not stocks or not chart_type:
+@main_bp.route('/chart-data/batch', methods=['POST'])
+@login_required
+def chart_data_batch():
+    # {"specs": [{"stock": "AAPL,MSFT", "type": "line", "avg": 20, ...}, ...]}
+    # with the /chart-data parameters per spec. Cached specs are served from
+    # the chart cache; the rest share one fetch. Returns {"results": [{"status":
+    # ..., "data": ...}]} in spec order.
+    specs = (request.get_json(silent=True) or {}).get("specs")
+    if not isinstance(specs, list) or not specs:
         return jsonify({"error": "Missing required parameters."}), 400
+    if len(specs) > current_app.config["CHART_BATCH_MAX_SPECS"]:
+        return jsonify({"error": f"At most {current_app.config['CHART_BATCH_MAX_SPECS']} specs per batch."}), 400
 
-    if include_current and not avg_days:
-        return jsonify({"error": "Include current requires average_days_back."}), 400
-
-    engine = get_engine()
-    query = """
-        SELECT date, close_last, open, high, low, label
-        FROM stock_prices
-        WHERE label = ANY(%s)
-    """
-    params = [stocks]  # stocks should be a list or tuple of stock labels
-
-    # ... date filtering as before ...
-    if start and end:
-        query += " AND date BETWEEN %s AND %s"
-        params.extend([start, end])
-    elif start:
-        query += " AND date >= %s"
-        params.append(start)
-    elif end:
-        query += " AND date <= %s"
-        params.append(end)
-
-    query += " ORDER BY date ASC"
-
-    # The trick: pass params as a tuple!
-    df = pd.read_sql_query(query, con=engine, params=tuple(params))
+    cache = get_chart_cache()
+    results = [None] * len(specs)
+    pending = []
+    for i, raw in enumerate(specs):
+        if not isinstance(raw, dict):
+            results[i] = (400, dumps_payload({"error": "Each spec must be an object."}))
+            continue
+        spec, error = chart_spec(MultiDict({
+            name: ",".join(map(str, value)) if isinstance(value, list)
+            else ("1" if value else "0") if isinstance(value, bool) else str(value)
+            for name, value in raw.items() if value is not None
+        }))
+        if error:
+            results[i] = (400, dumps_payload({"error": error}))
+            continue
+        body = cache.get(chart_cache_key(spec))
+        if body is not None:
+            results[i] = (200, body)
+        else:
+            pending.append((i, spec))
 
-    if df.empty:
-        return jsonify({"error": "No data found in range."}), 404
+    if pending:
+        built = build_batch_payloads([spec for _, spec in pending], current_app.config["CHART_BATCH_WORKERS"])
+        for (i, spec), (payload, status) in zip(pending, built):
+            with timed("encode"):
+                body = dumps_payload(payload)
+            if status == 200:
+                cache.set(chart_cache_key(spec), body, spec["stocks"], spec["start"], spec["end"])
+            results[i] = (status, body)
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date", "open", "high", "low", "close_last"])
-    df = df.sort_values(["label", "date"])
-    df["date_str"] = df["date"].dt.strftime("%Y-%m-%d")
+    body = b'{"results":[' + b",".join(
+        b'{"status":%d,"data":%s}' % (status, body if isinstance(body, bytes) else body.encode())
+        for status, body in results
+    ) + b"]}"
+    return current_app.response_class(body, mimetype="application/json")
 
-    fig = go.Figure()
-    all_suggestions = []
+@main_bp.route('/chart-data/cache-stats')
+@login_required
+def chart_cache_stats():
+    return jsonify(get_chart_cache().stats())
 
-    for stock in stocks:
-        s_df = df[df["label"] == stock].copy()
-        if s_df.empty:
-            continue
+@main_bp.route('/chart-data/store-stats')
+@login_required
+def chart_store_stats():
+    store = get_column_store()
+    if store is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **store.stats()})
 
-        if chart_type == "line":
-            fig.add_trace(go.Scatter(
-                x=s_df["date_str"],
-                y=s_df["close_last"],
-                mode="lines",
-                name=stock
-            ))
-        elif chart_type == "candlestick":
-            fig.add_trace(go.Candlestick(
-                x=s_df["date_str"],
-                open=s_df["open"],
-                high=s_df["high"],
-                low=s_df["low"],
-                close=s_df["close_last"],
-                name=stock
-            ))
-        else:
-            return jsonify({"error": f"Unknown chart type: {chart_type}"}), 400
-
-        suggestions = []
-        if avg_days:
-            try:
-                window = int(avg_days)
-                if include_current:
-                    s_df["avg"] = s_df["close_last"].rolling(window=window).mean()
-                else:
-                    s_df["avg"] = s_df["close_last"].shift(1).rolling(window=window).mean()
-
-                fig.add_trace(go.Scatter(
-                    x=s_df["date_str"],
-                    y=s_df["avg"],
-                    mode="lines",
-                    name=f"{stock} Avg {window}d",
-                    line=dict(dash="solid")
-                ))
-                suggestions = generate_suggestions(s_df)
-            except Exception as e:
-                print(f"⚠️ Failed to calculate average for {stock}: {e}")
-
-        all_suggestions += [
-            dict(stock=stock, **item)
-            for item in (suggestions or [])
-        ]
-
-    fig.update_layout(
-        title=f"{chart_type.capitalize()} Chart for {', '.join(stocks)}",
-        xaxis_title="Date",
-        yaxis_title="Price",
-        xaxis=dict(
-            type="category" if chart_type == "candlestick" else "date",
-            rangeslider={"visible": chart_type == "candlestick"}
-        ),
-        margin=dict(t=60)
-    )
-
-    fig_dict = sanitize_fig(fig.to_dict())
-    default_operation = get_long_decision_summary(all_suggestions)
-    cleaned = clean_suggestions_keep_last_as_sell(all_suggestions)
-    trade_table = analyze_trades(cleaned)
+@main_bp.route('/chart-data/sweep')
+@login_required
+def chart_sweep():
+    # Ranks every (window, include/exclude) combination of the moving-average
+    # strategy per stock; stock=* sweeps every label.
+    stocks = list(dict.fromkeys(s.strip() for s in request.args.get("stock", "").split(",") if s.strip()))
+    start = request.args.get("start") or None
+    end = request.args.get("end") or None
+    modes = [m.strip() for m in request.args.get("modes", "include,exclude").split(",") if m.strip()]
+    sort = request.args.get("sort", "cumulative_return")
+    limit = request.args.get("limit", 100, type=int)
+
+    if not stocks:
+        return jsonify({"error": "Missing required parameters."}), 400
+    try:
+        windows = parse_windows(request.args.get("windows", "2-250"), current_app.config["SWEEP_MAX_WINDOWS"])
+    except ValueError as e:
+        return jsonify({"error": f"Invalid windows: {e}"}), 400
+    if not modes or any(m not in SWEEP_MODES for m in modes):
+        return jsonify({"error": f"Modes must be among: {', '.join(SWEEP_MODES)}"}), 400
+    if sort not in RANK_KEYS:
+        return jsonify({"error": f"Sort must be one of: {', '.join(RANK_KEYS)}"}), 400
+
+    started = time.perf_counter()
+    df = load_chart_frame(None if stocks == ["*"] else stocks, start, end)
+    if df.empty:
+        return jsonify({"error": "No data found in range."}), 404
+    series = series_from_frame(df)
+    try:
+        rows = run_sweep(series, windows, modes, workers=current_app.config["SWEEP_WORKERS"])
+    except BrokenProcessPool:
+        return jsonify({"error": SWEEP_POOL_BROKEN}), 503
 
     return jsonify({
-        "plotly_figure": fig_dict,
-        "suggestions": all_suggestions,
-        "default_operation": default_operation,
-        "trade_table": trade_table
+        "results": rank(rows, sort, limit),
+        "evaluated": len(rows),
+        "stocks": len(series),
+        "windows": len(windows),
+        "modes": modes,
+        "sort": sort,
+        "elapsed": round(time.perf_counter() - started, 3),
     })
+
+@main_bp.route('/chart-data/portfolio')
+@login_required
+def chart_portfolio():
+    # Backtests the moving-average strategy on every stock (stock=* for all
+    # labels) and combines them into one equal-weight portfolio, or weighted
+    # by weights=AAPL:2,MSFT:1.
+    stocks = list(dict.fromkeys(s.strip() for s in request.args.get("stock", "").split(",") if s.strip()))
+    start = request.args.get("start") or None
+    end = request.args.get("end") or None
+    avg_days = request.args.get("avg", type=int)
+    include_current = request.args.get("include") == "1"
+
+    if not stocks or not avg_days or avg_days < 1:
+        return jsonify({"error": "Missing required parameters."}), 400
+    try:
+        weights = parse_weights(request.args.get("weights", ""))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid weights: {e}"}), 400
+
+    started = time.perf_counter()
+    df = load_chart_frame(None if stocks == ["*"] else stocks, start, end)
+    if df.empty:
+        return jsonify({"error": "No data found in range."}), 404
+    try:
+        portfolio = build_portfolio(series_from_frame(df), avg_days, include_current, weights,
+                                    workers=current_app.config["SWEEP_WORKERS"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except BrokenProcessPool:
+        return jsonify({"error": SWEEP_POOL_BROKEN}), 503
+
+    return jsonify({**portfolio, "elapsed": round(time.perf_counter() - started, 3)})
+
+@main_bp.route('/export/prices')
+@login_required
+def export_prices():
+    # Bulk read for analytics: raw rows for the labels (stock=* for all) and
+    # date range as an Arrow IPC stream, Parquet or CSV.
+    stocks = list(dict.fromkeys(s.strip() for s in request.args.get("stock", "").split(",") if s.strip()))
+    start = request.args.get("start") or None
+    end = request.args.get("end") or None
+    fmt = request.args.get("format", "arrow")
+
+    if not stocks:
+        return jsonify({"error": "Missing required parameters."}), 400
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        start, end = [date.fromisoformat(d) if d else None for d in (start, end)]
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD."}), 400
+    if fmt != "csv" and load_pyarrow() is None:
+        return jsonify({"error": f"The {fmt} format needs pyarrow installed."}), 501
+
+    query, params = price_query(None if stocks == ["*"] else stocks, start, end)
+    return export_response(query, params, fmt, "prices")
+
+@main_bp.route('/export/search.csv')
+@login_required
+def export_search():
+    # Every row matching the index page search, not just the visible page.
+    search = request.args.get('search', '').strip()
+    where_clause, params = parse_search(search) if search else ("", [])
+    query, params = search_query(where_clause, params)
+    return export_response(query, params, "csv", "search")
+
+def export_response(query, params, fmt, name):
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    body = stream_export(query, params, fmt, current_app.config["EXPORT_CHUNK_ROWS"])
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={name}.{extension}"})
+
+@main_bp.route('/metrics')
+def prometheus_metrics():
+    # For a scraper: METRICS_TOKEN as a bearer token, or a logged-in session.
+    token = current_app.config["METRICS_TOKEN"]
+    if not (token and request.headers.get("Authorization") == f"Bearer {token}") \
+            and not current_user.is_authenticated:
+        return jsonify({"error": "Unauthorized."}), 401
+
+    pools = pool_stats()
+    cache = get_chart_cache().stats()
+    gauges = [
+        ("db_pool_connections", "psycopg2 pool connections by state.",
+         {(("state", state),): pools["psycopg2"][state] for state in ("open", "in_use", "idle", "max_connections")}),
+        ("db_engine_connections", "SQLAlchemy pool connections by state.",
+         {(("state", state),): pools["engine"][state] for state in ("checked_in", "checked_out", "overflow")}),
+        ("chart_cache_entries", "Responses held in the chart cache.", {(): cache.get("entries", 0)}),
+        ("chart_cache_lookups", "Chart cache lookups by result since start.",
+         {(("result", "hit"),): cache.get("hits", 0), (("result", "miss"),): cache.get("misses", 0)}),
+    ]
+    return current_app.response_class(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+@main_bp.route('/pool-stats')
+@login_required
+def db_pool_stats():
+    return jsonify(pool_stats())
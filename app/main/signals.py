@@ -0,0 +1,87 @@
+import numpy as np
+
+NOTHING, LONG, SHORT, SELL = 0, 1, 2, 3
+ACTION_NAMES = np.array(["Nothing", "Long", "Short", "Sell"], dtype=object)
+
+
+def signal_actions(price, avg):
+    # Action code per row for the moving-average crossing strategy. Crossings and
+    # gradient signs are found in bulk; the Long/Short/Sell state machine only
+    # visits rows where price crosses the average, since nothing changes elsewhere.
+    price = np.asarray(price, dtype=float)
+    avg = np.asarray(avg, dtype=float)
+    n = len(price)
+    actions = np.zeros(n, dtype=np.int8)
+    if n < 2:
+        return actions
+
+    diff = price - avg
+    gradient = np.full(n, np.nan)
+    gradient[1:] = avg[1:] - avg[:-1]
+    with np.errstate(invalid='ignore'):
+        crossing = np.zeros(n, dtype=bool)
+        crossing[1:] = diff[1:] * diff[:-1] < 0
+        rising, falling = gradient > 0, gradient < 0
+        above, below = diff > 0, diff < 0
+
+    idx = np.flatnonzero(crossing)
+    codes = []
+    long_position = False
+    last_action = NOTHING
+    for up, down, over, under in zip(rising[idx].tolist(), falling[idx].tolist(),
+                                     above[idx].tolist(), below[idx].tolist()):
+        action = NOTHING
+        if not long_position:
+            if up and over:
+                action = LONG
+                long_position = True
+            elif down and under:
+                action = SHORT
+                long_position = True
+        elif last_action == LONG:
+            if up and (under or over):
+                action = SELL
+                long_position = False
+            elif down and under:
+                action = SHORT
+        elif last_action == SHORT:
+            if up and over:
+                action = LONG
+            elif up and under or down and over:
+                action = SELL
+                long_position = False
+        if action != NOTHING:
+            last_action = action
+        codes.append(action)
+    actions[idx] = codes
+    return actions
+
+
+def finite_or_none(values):
+    values = np.asarray(values, dtype=float)
+    return [v if ok else None for v, ok in zip(values.tolist(), np.isfinite(values).tolist())]
+
+
+def suggestion_rows(dates, price, avg, actions):
+    return [
+        {"date": d, "price": p, "avg": a, "action": action}
+        for d, p, a, action in zip(dates, finite_or_none(price), finite_or_none(avg),
+                                   ACTION_NAMES[actions].tolist())
+    ]
+
+
+def closed_trades(actions):
+    # Round trips for one stock, paired the way the trade table pairs them: the
+    # signal rows plus the final row (a Sell when it carries no signal), where a
+    # Long/Short directly followed by a Sell is one trade.
+    # Returns (entry indices, exit indices, is_long).
+    actions = np.asarray(actions)
+    if len(actions) == 0:
+        empty = np.array([], dtype=int)
+        return empty, empty, np.array([], dtype=bool)
+    events = np.append(np.flatnonzero(actions[:-1]), len(actions) - 1)
+    codes = actions[events].copy()
+    if codes[-1] == NOTHING:
+        codes[-1] = SELL
+    paired = np.isin(codes[:-1], (LONG, SHORT)) & (codes[1:] == SELL)
+    return events[:-1][paired], events[1:][paired], codes[:-1][paired] == LONG
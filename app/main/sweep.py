@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+from app.main.signals import signal_actions
+from app.main.trades import TradeLedger
+
+MODES = {"include": True, "exclude": False}
+RANK_KEYS = ("cumulative_return", "total_return", "max_drawdown", "trades", "avg_holding_days", "win_rate")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    # One long-lived pool per web process; spawning workers (and importing
+    # pandas in them) costs more than a typical sweep.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def discard_executor(executor):
+    # A worker died (OOM kill, segfault) and broke the pool; drop it so the
+    # next get_executor() starts a fresh one instead of failing every call.
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_windows(text, limit):
+    # "2-250", "2-250:5" (step) or "5,10,20"; duplicates dropped, order kept.
+    # Ranges are sized before they are expanded, so "1-999999999" fails fast.
+    windows = {}
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            bounds, _, step = part.partition(":")
+            low, high = (int(b) for b in bounds.split("-", 1))
+            step = int(step or 1)
+            if step < 1:
+                raise ValueError(f"Step must be positive in {part!r}.")
+            if low > high:
+                raise ValueError(f"Range {part!r} is reversed.")
+            values = range(max(low, 1), high + 1, step)
+        else:
+            values = [int(part)] if int(part) >= 1 else []
+        if len(values) > limit - len(windows):
+            raise ValueError(f"At most {limit} windows per sweep.")
+        windows.update(dict.fromkeys(values))
+    if not windows:
+        raise ValueError("No windows given.")
+    return list(windows)
+
+
+def sweep_stock(stock, days, close, windows, modes):
+    # Runs in a worker process: every (window, mode) for one stock's series.
+    series = pd.Series(close)
+    rows = []
+    for mode in modes:
+        base = series if MODES[mode] else series.shift(1)
+        for window in windows:
+            avg = base.rolling(window=window).mean().to_numpy()
+            if np.isnan(avg).all():
+                continue
+            actions = signal_actions(close, avg)
+            rows.append({"window": window, "mode": mode, **TradeLedger(stock, days, close, actions).summary()})
+    return rows
+
+
+def run_sweep(series_by_stock, windows, modes, workers=None, executor=None):
+    # series_by_stock: {stock: (days, close)} with days as integer day numbers.
+    # Windows are split into chunks so even a single stock fans out across workers.
+    workers = workers or os.cpu_count() or 1
+    chunks = max(1, min(len(windows), -(-workers * 2 // max(len(series_by_stock), 1))))
+    window_chunks = [chunk.tolist() for chunk in np.array_split(windows, chunks) if len(chunk)]
+    executor = executor or get_executor(workers)
+    try:
+        futures = [
+            executor.submit(sweep_stock, stock, days, close, chunk, modes)
+            for stock, (days, close) in series_by_stock.items()
+            for chunk in window_chunks
+        ]
+        return [row for future in futures for row in future.result()]
+    except BrokenProcessPool:
+        discard_executor(executor)
+        raise
+
+
+def series_from_frame(df):
+    return {
+        label: (group["date"].to_numpy(dtype="datetime64[D]").astype(np.int64),
+                group["close_last"].to_numpy(dtype=float))
+        for label, group in df.groupby("label", sort=False)
+    }
+
+
+def rank(rows, key, limit=None):
+    ranked = sorted(rows, key=lambda r: (r[key] is not None, r[key] or 0), reverse=True)
+    return ranked[:limit] if limit else ranked
@@ -0,0 +1,116 @@
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.db import get_db_connection
+
+# Ingestion widens the label's date range and adds the rows it inserted.
+RECORD_SQL = """
+    INSERT INTO tickers (label, first_date, last_date, row_count, last_ingested)
+    VALUES (%s, %s, %s, %s, now())
+    ON CONFLICT (label) DO UPDATE SET
+        first_date = LEAST(tickers.first_date, EXCLUDED.first_date),
+        last_date = GREATEST(tickers.last_date, EXCLUDED.last_date),
+        row_count = tickers.row_count + EXCLUDED.row_count,
+        last_ingested = EXCLUDED.last_ingested
+"""
+
+REBUILD_SQL = """
+    INSERT INTO tickers (label, first_date, last_date, row_count, last_ingested)
+    SELECT label, MIN(date), MAX(date), COUNT(*), now()
+    FROM stock_prices
+    {where}
+    GROUP BY label
+    ON CONFLICT (label) DO UPDATE SET
+        first_date = EXCLUDED.first_date,
+        last_date = EXCLUDED.last_date,
+        row_count = EXCLUDED.row_count
+"""
+
+
+def record_ticker(cur, label, first_date, last_date, inserted):
+    cur.execute(RECORD_SQL, (label, first_date, last_date, inserted))
+
+
+def rebuild_tickers(cur, labels=None):
+    # Recounts from stock_prices, e.g. after rows were deleted by hand;
+    # labels without rows any more are removed.
+    if labels is None:
+        cur.execute("DELETE FROM tickers WHERE label NOT IN (SELECT DISTINCT label FROM stock_prices)")
+        cur.execute(REBUILD_SQL.format(where=""))
+    else:
+        cur.execute("DELETE FROM tickers t WHERE label = ANY(%s) "
+                    "AND NOT EXISTS (SELECT 1 FROM stock_prices p WHERE p.label = t.label)", (labels,))
+        cur.execute(REBUILD_SQL.format(where="WHERE label = ANY(%s)"), (labels,))
+    return cur.rowcount
+
+
+class TickerCache:
+    # The ticker list with date ranges, kept in-process. Ingestion in this
+    # process invalidates it; the TTL bounds how long other processes serve
+    # a stale list.
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._tickers = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._tickers is None or self._expires < time.monotonic():
+                self._tickers = load_tickers()
+                self._expires = time.monotonic() + self.ttl
+            return self._tickers
+
+    def invalidate(self):
+        with self._lock:
+            self._tickers = None
+
+
+def load_tickers():
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT label, first_date, last_date, row_count, last_ingested
+                FROM tickers
+                ORDER BY label
+            """)
+            return [
+                {
+                    'label': label,
+                    'first_date': first_date.isoformat(),
+                    'last_date': last_date.isoformat(),
+                    'rows': rows,
+                    'last_ingested': last_ingested.isoformat(),
+                }
+                for label, first_date, last_date, rows, last_ingested in cur.fetchall()
+            ]
+
+
+def init_tickers(app):
+    app.extensions['ticker_cache'] = TickerCache(ttl=app.config['TICKER_CACHE_TTL'])
+
+
+def get_tickers():
+    return current_app.extensions['ticker_cache'].get()
+
+
+def invalidate_tickers():
+    cache = current_app.extensions.get('ticker_cache')
+    if cache is not None:
+        cache.invalidate()
+
+
+@click.command("rebuild-tickers")
+@click.argument("labels", nargs=-1)
+@with_appcontext
+def rebuild_tickers_command(labels):
+    """Recompute the tickers table for LABELS (default: every label)."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            rows = rebuild_tickers(cur, [label.upper() for label in labels] or None)
+        conn.commit()
+    invalidate_tickers()
+    click.echo(f"Refreshed {rows} tickers.")
@@ -0,0 +1,124 @@
+import numpy as np
+from app.main.signals import LONG, SHORT, closed_trades, suggestion_rows
+
+
+class TradeLedger:
+    # One stock's signals and closed trades, held as arrays. Trades pair the
+    # same way the old suggestion-list passes did, but per stock, so every
+    # stock's open position is closed on its own last row.
+
+    def __init__(self, stock, days, prices, actions, avg=None, dates=None):
+        self.stock = stock
+        self.days = np.asarray(days).astype("datetime64[D]")
+        self.prices = np.asarray(prices, dtype=float)
+        self.actions = np.asarray(actions, dtype=np.int8)
+        self.avg = np.full(len(self.prices), np.nan) if avg is None else np.asarray(avg, dtype=float)
+        self._dates = dates
+
+        self.entries, self.exits, self.is_long = closed_trades(self.actions)
+        entry, exit_ = self.prices[self.entries], self.prices[self.exits]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.pnl_pct = np.where(self.is_long, 100 * (exit_ - entry) / entry, 100 * (entry - exit_) / entry)
+            self.growth = np.where(self.is_long, exit_ / entry, entry / exit_)
+        self.holding_days = (self.days[self.exits] - self.days[self.entries]).astype(np.int64)
+
+    @classmethod
+    def from_frame(cls, stock, s_df, actions, price_col="close_last", avg_col="avg"):
+        return cls(stock, s_df["date"].to_numpy(dtype="datetime64[D]"), s_df[price_col].to_numpy(dtype=float),
+                   actions, avg=s_df[avg_col].to_numpy(dtype=float), dates=s_df["date_str"].tolist())
+
+    def __len__(self):
+        return len(self.actions)
+
+    @property
+    def empty(self):
+        # No rows, or no average to signal from: the old suggestion list was
+        # empty for such a stock.
+        return not len(self) or not np.isfinite(self.avg).any()
+
+    @property
+    def dates(self):
+        if self._dates is None:
+            self._dates = np.datetime_as_string(self.days, unit="D").tolist()
+        return self._dates
+
+    def suggestions(self):
+        return [dict(stock=self.stock, **row)
+                for row in suggestion_rows(self.dates, self.prices, self.avg, self.actions)]
+
+    def signals(self):
+        idx = np.flatnonzero(self.actions)
+        dates = self.dates
+        return [dict(stock=self.stock, **row)
+                for row in suggestion_rows([dates[i] for i in idx], self.prices[idx], self.avg[idx],
+                                           self.actions[idx])]
+
+    def first_position(self):
+        idx = np.flatnonzero(np.isin(self.actions, (LONG, SHORT)))
+        return int(idx[0]) if len(idx) else None
+
+    def equity(self):
+        # Compounded value of 1 after each trade.
+        return np.cumprod(self.growth)
+
+    def max_drawdown(self):
+        if not len(self.growth):
+            return 0.0
+        equity = np.concatenate(([1.0], self.equity()))
+        return float(((equity / np.maximum.accumulate(equity)) - 1).min() * 100)
+
+    def summary(self):
+        trades = len(self.entries)
+        return {
+            "stock": self.stock,
+            "trades": trades,
+            "wins": int((self.pnl_pct > 0).sum()),
+            "win_rate": round(float((self.pnl_pct > 0).mean() * 100), 1) if trades else None,
+            "total_return": round(float(self.pnl_pct.sum()), 2),
+            "cumulative_return": round(float((self.growth.prod() - 1) * 100), 2),
+            "max_drawdown": round(self.max_drawdown(), 2),
+            "avg_holding_days": round(float(self.holding_days.mean()), 1) if trades else None,
+        }
+
+    def trade_table(self):
+        # Same rows as the old analyze_trades, plus the running compounded
+        # return the charts page used to compute client-side.
+        dates = self.dates
+        rows = []
+        columns = zip(self.entries.tolist(), self.exits.tolist(), self.is_long.tolist(), self.pnl_pct.tolist(),
+                      self.growth.tolist(), self.equity().tolist(), self.holding_days.tolist())
+        for entry, exit_, is_long, pnl_pct, growth, equity, holding_days in columns:
+            rows.append({
+                "stock": self.stock,
+                "entry_action": "Long" if is_long else "Short",
+                "entry_date": dates[entry],
+                "entry_price": float(self.prices[entry]),
+                "exit_date": dates[exit_],
+                "exit_price": float(self.prices[exit_]),
+                "pnl_pct": round(pnl_pct, 2),
+                "pnl_percentage": f"{round(100 * growth, 2)}%",
+                "holding_days": holding_days,
+                "cumulative_return": f"{equity * 100:.2f}%",
+            })
+        return rows
+
+
+def decision_summary(ledgers):
+    # From the first Long/Short of the first stock that has one to the last
+    # row of the last stock with suggestions.
+    ledgers = [ledger for ledger in ledgers if not ledger.empty]
+    first = next(((ledger, ledger.first_position()) for ledger in ledgers
+                  if ledger.first_position() is not None), None)
+    if not first:
+        return None
+    ledger, i = first
+    last = ledgers[-1]
+    first_price, last_price = float(ledger.prices[i]), float(last.prices[-1])
+    percent_change = 100 * (last_price - first_price) / first_price if first_price else None
+    return {
+        "first_operation_date": ledger.dates[i],
+        "first_operation_price": first_price,
+        "last_operation_date": last.dates[-1],
+        "last_operation_price": last_price,
+        "percent_change": round(percent_change, 2) if percent_change is not None else None
+    }
@@ -1,8 +1,15 @@
 import io, os, re
+from datetime import date, timedelta
 import numpy as np
 import pandas as pd
 from urllib.parse import urlparse
 from app.db import get_db_connection
+from app.main.cache import invalidate_charts
+from app.main.column_store import refresh_column_store
+from app.main.indicators import refresh_indicators
+from app.main.manifest import record_file
+from app.main.tickers import invalidate_tickers, record_ticker
+from app.main.signals import signal_actions, suggestion_rows
 
 def extract_file_base_name(filename_or_url):
     if filename_or_url.startswith('http'):
@@ -12,32 +19,181 @@ def extract_file_base_name(filename_or_url):
         file = os.path.basename(filename_or_url)
     return os.path.splitext(file)[0]
 
+PRICE_FIELDS = ['Close/Last', 'Open', 'High', 'Low']
+PARSE_CHUNK_ROWS = 100_000
+DATE_FORMAT = '%m/%d/%Y'
+DATE_SEPARATORS = [2, 5]
+
+def parse_dates(values):
+    # MM/DD/YYYY converted with fixed-width byte arithmetic, several times
+    # faster than strptime-based to_datetime. Anything that is not a real
+    # date in exactly that shape goes through to_datetime, so bad input still
+    # raises the same error.
+    try:
+        raw = values.to_numpy(dtype='S11')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return pd.to_datetime(values, format=DATE_FORMAT)
+    digits = raw.view(np.uint8).reshape(-1, 11).astype(np.int64) - ord('0')
+    fields = np.delete(digits[:, :10], DATE_SEPARATORS, axis=1)
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    month = digits[:, 0] * 10 + digits[:, 1]
+    day = digits[:, 3] * 10 + digits[:, 4]
+    well_formed = ((digits[:, 10] == -ord('0')).all() and (digits[:, DATE_SEPARATORS] == ord('/') - ord('0')).all()
+                   and ((fields >= 0) & (fields <= 9)).all() and ((month >= 1) & (month <= 12)).all())
+    if not well_formed:
+        return pd.to_datetime(values, format=DATE_FORMAT)
+    months = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)
+    dates = months.astype('datetime64[D]') + (day - 1)
+    # Day 31 of a 30-day month would roll over into the next month.
+    if (dates.astype('datetime64[M]') != months).any() or (day < 1).any():
+        return pd.to_datetime(values, format=DATE_FORMAT)
+    return pd.Series(dates.astype('datetime64[us]'), index=values.index, name=values.name)
+
+def parse_csv_stream(source, chunksize=PARSE_CHUNK_ROWS):
+    # Yields frames of at most `chunksize` rows from a path or file object, so
+    # memory stays bounded by the chunk rather than the file. Prices are read
+    # as text and stripped of "$" and "," with literal (non-regex) replaces;
+    # Volume is parsed natively with "," as the thousands separator.
+    reader = pd.read_csv(source, chunksize=chunksize, dtype={col: object for col in PRICE_FIELDS}, thousands=',')
+    with reader:
+        for df in reader:
+            for col in PRICE_FIELDS:
+                df[col] = df[col].str.replace('$', '', regex=False).str.replace(',', '', regex=False).astype(float)
+            df['Volume'] = df['Volume'].astype(int)
+            df['Date'] = parse_dates(df['Date'])
+            yield df
+
+def file_label(file_name):
+    return file_name.split('_')[0].upper()
+
 def parse_csv(content):
-    df = pd.read_csv(io.StringIO(content))
-    for col in ['Close/Last', 'Open', 'High', 'Low']:
-        df[col] = df[col].replace(r'[\$,]', '', regex=True).astype(float)
-    df['Volume'] = df['Volume'].replace(r'[,]', '', regex=True).astype(int)
-    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y')
-    return df
+    return pd.concat(parse_csv_stream(io.StringIO(content)), ignore_index=True)
 
-def insert_data(df, file_name):
+PRICE_COLUMNS = ['date', 'close_last', 'volume', 'open', 'high', 'low', 'label']
+
+def staged_csv(df, label):
+    staged = pd.DataFrame({
+        'date': df['Date'].dt.strftime('%Y-%m-%d'),
+        'close_last': df['Close/Last'],
+        'volume': df['Volume'],
+        'open': df['Open'],
+        'high': df['High'],
+        'low': df['Low'],
+        'label': label,
+    })
+    buf = io.StringIO()
+    staged.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    return buf
+
+def insert_batches(batches, file_name, since=None, manifest=None):
+    # COPY each parsed batch into a temp staging table, then merge set-wise
+    # once per file. Rows on or before `since` are dropped before the COPY;
+    # `manifest` is recorded in the same transaction as the rows. Returns
+    # (inserted, skipped, rows read).
+    label = file_label(file_name)
+    columns = ', '.join(PRICE_COLUMNS)
+    rows = delta = 0
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            for _, row in df.iterrows():
-                try:
-                    cur.execute("""
-                        INSERT INTO stock_prices
-                        (date, close_last, volume, open, high, low, label)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (date, label) DO NOTHING;
-                    """, (
-                        row['Date'], row['Close/Last'], row['Volume'],
-                        row['Open'], row['High'], row['Low'],
-                        file_name.split('_')[0].upper()
-                    ))
-                except Exception as e:
-                    print(f"Error inserting row: {e}")
+            cur.execute(f"""
+                CREATE TEMP TABLE stock_prices_staging ON COMMIT DROP AS
+                SELECT {columns} FROM stock_prices WITH NO DATA;
+            """)
+            for df in batches:
+                rows += len(df)
+                if since is not None:
+                    df = df[df['Date'] > pd.Timestamp(since)]
+                if len(df):
+                    cur.copy_expert(f"COPY stock_prices_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                                    staged_csv(df, label))
+                    delta += len(df)
+            cur.execute(f"""
+                WITH inserted AS (
+                    INSERT INTO stock_prices ({columns})
+                    SELECT {columns} FROM stock_prices_staging
+                    ON CONFLICT (date, label) DO NOTHING
+                    RETURNING date
+                )
+                SELECT COUNT(*), MIN(date), MAX(date) FROM inserted;
+            """)
+            inserted, first_date, last_date = cur.fetchone()
+            if inserted:
+                refresh_indicators(cur, label, first_date)
+                record_ticker(cur, label, first_date, last_date, inserted)
+            if manifest:
+                record_file(cur, manifest)
         conn.commit()
+    if inserted:
+        invalidate_charts(label, first_date, last_date)
+        invalidate_tickers()
+        refresh_column_store(label, first_date)
+    return inserted, delta - inserted, rows
+
+def insert_data(df, file_name):
+    return insert_batches([df], file_name)[:2]
+
+TICKER_RE = re.compile(r'^[A-Za-z0-9.\-^]{1,16}$')
+
+def parse_date_bounds(text):
+    # Half-open [first, after) range covered by a day, month or year, or None.
+    text = text.strip()
+    try:
+        m = re.fullmatch(r'(\d{4})-(\d{1,2})-(\d{1,2})', text)
+        if m:
+            first = date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+            return first, first + timedelta(days=1)
+        m = re.fullmatch(r'(\d{1,2})/(\d{1,2})/(\d{4})', text)
+        if m:
+            first = date(int(m.group(3)), int(m.group(1)), int(m.group(2)))
+            return first, first + timedelta(days=1)
+        m = re.fullmatch(r'(\d{4})-(\d{1,2})', text)
+        if m:
+            year, month = int(m.group(1)), int(m.group(2))
+            first = date(year, month, 1)
+            return first, date(year + month // 12, month % 12 + 1, 1)
+        m = re.fullmatch(r'(\d{4})', text)
+        if m:
+            year = int(m.group(1))
+            return date(year, 1, 1), date(year + 1, 1, 1)
+    except ValueError:
+        pass
+    return None
+
+def date_condition(val):
+    # Range predicates on `date` (index-friendly) for days, months, years,
+    # comparisons such as >=2023-01 and ranges such as 2023-01..2023-06.
+    if '..' in val:
+        low, high = [x.strip() for x in val.split('..', 1)]
+        low_bounds = parse_date_bounds(low) if low else None
+        high_bounds = parse_date_bounds(high) if high else None
+        if (low and not low_bounds) or (high and not high_bounds) or not (low or high):
+            return None
+        conditions, params = [], []
+        if low_bounds:
+            conditions.append("date >= %s")
+            params.append(low_bounds[0])
+        if high_bounds:
+            conditions.append("date < %s")
+            params.append(high_bounds[1])
+        return " AND ".join(conditions), params
+
+    m = re.match(r'^(>=|<=|>|<|==|=)?\s*(.*)$', val)
+    op = m.group(1) or '='
+    bounds = parse_date_bounds(m.group(2))
+    if not bounds:
+        return None
+    first, after = bounds
+    if op in ('=', '=='):
+        if after - first == timedelta(days=1):
+            return "date = %s", [first]
+        return "date >= %s AND date < %s", [first, after]
+    return {
+        '>=': ("date >= %s", [first]),
+        '>': ("date >= %s", [after]),
+        '<': ("date < %s", [first]),
+        '<=': ("date < %s", [after]),
+    }[op]
 
 def parse_search(search):
     conditions = []
@@ -51,13 +207,26 @@ def parse_search(search):
             col = col.lower()
             if col in valid_cols:
                 if col == 'label':
-                    m = re.match(r'^(=|==)?\s*(.*)$', val)
-                    if m:
-                        conditions.append(f"{col} ILIKE %s")
-                        params.append(f'%{m.group(2)}%')
+                    # label:AAPL / label:=AAPL match the ticker exactly (btree);
+                    # label:~app or non-ticker text is a substring match (pg_trgm).
+                    m = re.match(r'^(==|=|~)?\s*(.*)$', val)
+                    op, text = m.group(1), m.group(2).strip()
+                    if not text:
+                        continue
+                    if op != '~' and TICKER_RE.match(text):
+                        conditions.append("label = %s")
+                        params.append(text.upper())
+                    else:
+                        conditions.append("label ILIKE %s")
+                        params.append(f'%{text}%')
                 elif col == 'date':
-                    conditions.append("CAST(date AS TEXT) ILIKE %s")
-                    params.append(f'%{val}%')
+                    condition = date_condition(val)
+                    if condition:
+                        conditions.append(condition[0])
+                        params.extend(condition[1])
+                    else:
+                        conditions.append("CAST(date AS TEXT) ILIKE %s")
+                        params.append(f'%{val}%')
                 elif col in {'volume', 'close_last', 'open', 'high', 'low'}:
                     m = re.match(r'^(>=|<=|>|<|=)?\s*(.*)$', val)
                     if m:
@@ -70,11 +239,52 @@ def parse_search(search):
                         except ValueError:
                             pass
         else:
-            conditions.append("(label ILIKE %s OR CAST(date AS TEXT) ILIKE %s)")
-            params.extend([f'%{part}%', f'%{part}%'])
+            condition = date_condition(part)
+            if condition:
+                conditions.append(condition[0])
+                params.extend(condition[1])
+            elif re.search(r'\d', part):
+                # partial dates such as "05-01" can only be matched textually
+                conditions.append("(label ILIKE %s OR CAST(date AS TEXT) ILIKE %s)")
+                params.extend([f'%{part}%', f'%{part}%'])
+            else:
+                conditions.append("label ILIKE %s")
+                params.append(f'%{part}%')
 
     return ("WHERE " + " AND ".join(conditions), params) if conditions else ("", [])
 
+GRID_COLUMNS = ['date', 'close_last', 'volume', 'open', 'high', 'low', 'label']
+
+def grid_page_query(where_clause, params, order_col='date', order_dir='desc', start=0, length=20, after=None):
+    # Page query for the index grid. Ordering by date pages with a (date, label)
+    # keyset cursor when the client sends the last row of the previous page;
+    # any other ordering (or a random page jump) falls back to OFFSET.
+    if order_col not in GRID_COLUMNS:
+        order_col = 'date'
+    direction = 'ASC' if order_dir == 'asc' else 'DESC'
+    conditions = [where_clause[len('WHERE '):]] if where_clause else []
+    params = list(params)
+    if order_col == 'date':
+        order_by = f"date {direction}, label ASC"
+    else:
+        order_by = f"{order_col} {direction}, date DESC, label ASC"
+
+    offset = start
+    if after and order_col == 'date':
+        after_date, after_label = after
+        cmp, strict = ('<=', '<') if direction == 'DESC' else ('>=', '>')
+        # The leading date bound keeps the predicate sargable on the date index.
+        conditions.append(f"date {cmp} %s AND (date {strict} %s OR label > %s)")
+        params.extend([after_date, after_date, after_label])
+        offset = 0
+
+    query = f"SELECT {', '.join(GRID_COLUMNS)} FROM stock_prices"
+    if conditions:
+        query += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+    query += f" ORDER BY {order_by} LIMIT %s OFFSET %s"
+    params.extend([length, offset])
+    return query, params
+
 def sanitize_fig(obj):
     if isinstance(obj, dict):
         return {k: sanitize_fig(v) for k, v in obj.items()}
@@ -98,101 +308,7 @@ def generate_suggestions(df, price_col='close_last', avg_col='avg'):
     if avg_col not in df or df[avg_col].isna().all():
         return []
 
-    df['avg_prev'] = df[avg_col].shift(1)
-    df['avg_gradient'] = df[avg_col] - df['avg_prev']
-    df['diff'] = df[price_col] - df[avg_col]
-    df['crossing'] = df['diff'] * df['diff'].shift(1) < 0
-
-    suggestions = []
-    last_action = "Nothing"
-    long_position = False
-    for idx, row in df.iterrows():
-        date = str(row.get('date_str', row['date']))
-        price = safe_float(row[price_col])
-        avg = safe_float(row[avg_col])
-        gradient = row['avg_gradient']
-        crossing = row['crossing']
-        diff = row['diff']
-
-        action = "Nothing"
-        if not long_position and crossing:
-            if gradient > 0 and diff > 0:
-                action = "Long"
-                long_position = True
-            elif gradient < 0 and diff < 0:
-                action = "Short"
-                long_position = True
-        elif long_position and last_action == "Long" and crossing:
-            if gradient > 0 and diff < 0 or gradient > 0 and diff > 0:
-                action = "Sell"
-                long_position = False
-            elif gradient < 0 and diff < 0:
-                action = "Short"
-        elif long_position and last_action == "Short" and crossing:
-            if gradient > 0 and diff > 0:
-                action = "Long"
-                long_position = True
-            elif gradient > 0 and diff < 0 or gradient < 0 and diff > 0:
-                action = "Sell"
-                long_position = False
-
-        if action in ["Long", "Short", "Sell"]:
-            last_action = action
-
-        suggestions.append({"date": date, "price": price, "avg": avg, "action": action})
-    return suggestions
-
-def get_long_decision_summary(suggestions):
-    first_oper = next((s for s in suggestions if s['action'] in ["Long", "Short"]), None)
-    if not first_oper:
-        return None
-    last = suggestions[-1]
-    try:
-        percent_change = 100 * (last['price'] - first_oper['price']) / first_oper['price']
-    except Exception:
-        percent_change = None
-    return {
-        "first_operation_date": first_oper["date"],
-        "first_operation_price": first_oper["price"],
-        "last_operation_date": last["date"],
-        "last_operation_price": last["price"],
-        "percent_change": round(percent_change, 2) if percent_change is not None else None
-    }
-
-def clean_suggestions_keep_last_as_sell(suggestions):
-    if not suggestions:
-        return []
-    cleaned = [s for s in suggestions[:-1] if s['action'] != "Nothing"]
-    last = suggestions[-1].copy()
-    if last['action'] == "Nothing":
-        last['action'] = "Sell"
-    cleaned.append(last)
-    return cleaned
-
-def analyze_trades(suggestions):
-    from datetime import datetime
-    trades = []
-    i = 0
-    while i < len(suggestions) - 1:
-        entry, exit = suggestions[i], suggestions[i+1]
-        if entry["action"] not in ["Long", "Short"] or exit["action"] != "Sell":
-            i += 1
-            continue
-
-        pnl_pct = 100 * (exit["price"] - entry["price"]) / entry["price"] if entry["action"] == "Long" else 100 * (entry["price"] - exit["price"]) / entry["price"]
-        pct = 100 * (exit["price"] / entry["price"]) if entry["action"] == "Long" else 100 * (entry["price"] / exit["price"])
-        holding_days = (datetime.strptime(exit["date"], "%Y-%m-%d") - datetime.strptime(entry["date"], "%Y-%m-%d")).days
-
-        trades.append({
-            "stock": entry["stock"],
-            "entry_action": entry["action"],
-            "entry_date": entry["date"],
-            "entry_price": entry["price"],
-            "exit_date": exit["date"],
-            "exit_price": exit["price"],
-            "pnl_pct": round(pnl_pct, 2),
-            "pnl_percentage": f"{round(pct, 2)}%",
-            "holding_days": holding_days
-        })
-        i += 2
-    return trades
+    price = df[price_col].to_numpy(dtype=float)
+    avg = df[avg_col].to_numpy(dtype=float)
+    dates = [str(d) for d in (df['date_str'] if 'date_str' in df else df['date'])]
+    return suggestion_rows(dates, price, avg, signal_actions(price, avg))
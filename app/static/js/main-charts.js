@@ -1,13 +1,34 @@
 document.addEventListener("DOMContentLoaded", () => {
   const form = document.getElementById("chartForm");
+  const stockSelect = document.getElementById("stock");
+  const startInput = document.getElementById("start_date");
+  const endInput = document.getElementById("end_date");
+
+  // Dates with data for any of the selected stocks (ISO strings compare as dates).
+  function selectedRange() {
+    const options = Array.from(stockSelect.selectedOptions);
+    if (!options.length) return null;
+    return {
+      first: options.map(o => o.dataset.first).sort()[0],
+      last: options.map(o => o.dataset.last).sort().pop(),
+    };
+  }
+
+  // Limits the date pickers to the available range so empty windows are
+  // not requested.
+  stockSelect.addEventListener("change", () => {
+    const range = selectedRange();
+    startInput.min = endInput.min = range ? range.first : "";
+    startInput.max = endInput.max = range ? range.last : "";
+    document.getElementById("stock_range").textContent = range ? `Data available ${range.first} – ${range.last}` : "";
+  });
 
   form.addEventListener("submit", async function (e) {
     e.preventDefault();
 
-    const stockSelect = document.getElementById("stock");
     const selectedStocks = Array.from(stockSelect.selectedOptions).map(opt => opt.value);
-    const startDate = document.getElementById("start_date").value;
-    const endDate = document.getElementById("end_date").value;
+    const startDate = startInput.value;
+    const endDate = endInput.value;
     const type = document.getElementById("type").value;
 
     if (!selectedStocks.length || /*!startDate || !endDate ||*/ !type) {
@@ -15,6 +36,12 @@ document.addEventListener("DOMContentLoaded", () => {
       return;
     }
 
+    const range = selectedRange();
+    if ((startDate && startDate > range.last) || (endDate && endDate < range.first)) {
+      alert(`No data in that range; the selected stocks cover ${range.first} – ${range.last}.`);
+      return;
+    }
+
     const chartContainer = document.getElementById("chart");
     chartContainer.innerHTML = `
       <div id="plotly-chart" style="height: 500px; width: 100%;">
@@ -29,7 +56,11 @@ document.addEventListener("DOMContentLoaded", () => {
       stock: selectedStocks.join(","),
       start: startDate,
       end: endDate,
-      type: type
+      type: type,
+      format: "columnar",
+      // A chart cannot show more points than it has pixels; rounded so repeat
+      // requests share the server-side cache.
+      max_points: Math.max(1000, Math.ceil((chartContainer.clientWidth * 2) / 1000) * 1000)
     });
 
     if (avgDays) {
@@ -41,17 +72,21 @@ document.addEventListener("DOMContentLoaded", () => {
       const res = await fetch(`/chart-data?${query.toString()}`);
       const json = await res.json();
 
-      if (!res.ok || !json.plotly_figure) {
+      if (!res.ok || !(json.series || json.plotly_figure)) {
         throw new Error(json.error || "Server returned no chart data");
       }
+      const figure = json.format === "columnar"
+        ? { data: buildTraces(json), layout: json.layout }
+        : json.plotly_figure;
+      const signals = json.signals || json.suggestions;
 
       const plotDiv = document.getElementById("plotly-chart");
       plotDiv.innerHTML = "";
       Plotly.purge(plotDiv);
 
       const annotations = [];
-      if (Array.isArray(json.suggestions)) {
-        json.suggestions.forEach(s => {
+      if (Array.isArray(signals)) {
+        signals.forEach(s => {
           if (s.action !== "Nothing") {
             let color, bgcolor, bordercolor, ay;
             if (s.action === "Long") {
@@ -101,7 +136,7 @@ document.addEventListener("DOMContentLoaded", () => {
         });
       }
 
-      let layout = { ...json.plotly_figure.layout };
+      let layout = { ...figure.layout };
       if (annotations.length > 0) layout.annotations = annotations;
 
       if (json.default_operation) {
@@ -127,11 +162,11 @@ document.addEventListener("DOMContentLoaded", () => {
         }
       }
 
-      console.log("Plotly data", json.plotly_figure.data);
+      console.log("Plotly data", figure.data);
       console.log("Plotly layout", layout);
-      console.log("Suggestions", json.suggestions);
+      console.log("Signals", signals);
 
-      Plotly.newPlot(plotDiv, json.plotly_figure.data, layout);
+      Plotly.newPlot(plotDiv, figure.data, layout);
 
       // Operation Summary
       if (json.default_operation) {
@@ -151,10 +186,28 @@ document.addEventListener("DOMContentLoaded", () => {
         document.getElementById("default-operation-summary-table").innerHTML = "";
       }
 
+      // Per-stock trade statistics (cumulative return, drawdown, win rate...)
+      if (Array.isArray(json.trade_summary) && json.trade_summary.length > 0) {
+        const columns = Object.keys(json.trade_summary[0]);
+        const header = columns.map(col =>
+          `<th>${col.replace(/_/g, " ").replace(/\b\w/g, l => l.toUpperCase())}</th>`
+        ).join("");
+        const rows = json.trade_summary.map(stat =>
+          `<tr>${columns.map(col => `<td>${stat[col] !== null ? stat[col] : ""}</td>`).join("")}</tr>`
+        ).join("");
+        document.getElementById("trade-summary-table").innerHTML = `
+          <h5>Trade Summary</h5>
+          <table class="table table-bordered table-striped">
+            <thead><tr>${header}</tr></thead>
+            <tbody>${rows}</tbody>
+          </table>
+        `;
+      } else {
+        document.getElementById("trade-summary-table").innerHTML = "";
+      }
+
       // ✅ Fix: only run if trade_table exists
       if (Array.isArray(json.trade_table)&& json.trade_table.length > 0) {
-        addCumulativeColumn(json.trade_table, 'pnl_percentage', 'cumulative_return');
-
         const columns = Object.keys(json.trade_table[0]);
         if (columns.includes("stock")) {
           columns.unshift(...columns.splice(columns.indexOf("stock"), 1));
@@ -187,16 +240,19 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 });
 
-function addCumulativeColumn(data, percentageKey = 'pnl_percentage', newCol = 'cumulative_return') {
-  if (!Array.isArray(data)) {
-    console.warn("⚠️ addCumulativeColumn skipped: data is not an array");
-    return;
-  }
-  let cumulative = 1;
-  for (let i = 0; i < data.length; ++i) {
-    const pctStr = data[i][percentageKey];
-    const pct = pctStr ? parseFloat(pctStr.replace('%', '')) / 100 : 1;
-    cumulative *= pct;
-    data[i][newCol] = (cumulative * 100).toFixed(2) + '%';
-  }
+// Builds Plotly traces from the columnar /chart-data payload: one price trace
+// (line or candlestick) per stock plus its moving average when requested.
+function buildTraces(json) {
+  const traces = [];
+  json.series.forEach(s => {
+    if (json.chart_type === "candlestick") {
+      traces.push({ type: "candlestick", x: s.x, open: s.open, high: s.high, low: s.low, close: s.close, name: s.stock });
+    } else {
+      traces.push({ type: "scatter", mode: "lines", x: s.x, y: s.close, name: s.stock });
+    }
+    if (s.avg) {
+      traces.push({ type: "scatter", mode: "lines", x: s.x, y: s.avg, name: s.avg_name, line: { dash: "solid" } });
+    }
+  });
+  return traces;
 }
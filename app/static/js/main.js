@@ -1,12 +1,46 @@
 // Initialize DataTables after DOM is ready
 document.addEventListener("DOMContentLoaded", function () {
-  const table = document.querySelector("table");
+  const table = document.getElementById("pricesTable");
   if (table) {
+    // Last row of each fetched page, keyed by ordering + page start, so paging
+    // forward can send a keyset cursor instead of a growing OFFSET.
+    const cursors = {};
+
     $(table).DataTable({
       searching: false,
       paging: true,
       ordering: true,
       pageLength: 20,
+      serverSide: true,
+      processing: true,
+      order: [[0, "desc"]],
+      ajax: function (data, callback) {
+        const order = data.order[0] || { column: 0, dir: "desc" };
+        const orderKey = `${order.column}:${order.dir}`;
+        const params = new URLSearchParams({
+          draw: data.draw,
+          start: data.start,
+          length: data.length,
+          "order[0][column]": order.column,
+          "order[0][dir]": order.dir,
+          search: table.dataset.search,
+        });
+        const cursor = cursors[orderKey]?.[data.start];
+        if (cursor) {
+          params.set("after_date", cursor[0]);
+          params.set("after_label", cursor[1]);
+        }
+        fetch(`${table.dataset.url}?${params.toString()}`)
+          .then((res) => res.json())
+          .then((json) => {
+            const last = json.data[json.data.length - 1];
+            if (last) {
+              cursors[orderKey] = cursors[orderKey] || {};
+              cursors[orderKey][data.start + json.data.length] = [last[0], last[6]];
+            }
+            callback(json);
+          });
+      },
     });
   }
   // --- Upload Elements ---
@@ -74,6 +108,78 @@ document.addEventListener("DOMContentLoaded", function () {
     updateFileList();
   }
 
+  function finishUpload() {
+    uploadBtn.disabled = false;
+    btnText.textContent = "Upload";
+    spinner.classList.add("d-none");
+  }
+
+  function renderProgress(job) {
+    const pct = job.files_total ? Math.round((100 * job.files_done) / job.files_total) : 0;
+    const errors = job.errors.length
+      ? `<div class="text-danger small mt-1">${job.errors.length} file(s) failed</div>`
+      : "";
+    result.innerHTML = `
+      <div class="progress" role="progressbar" aria-valuenow="${pct}" aria-valuemin="0" aria-valuemax="100">
+        <div class="progress-bar progress-bar-striped progress-bar-animated" style="width: ${pct}%">${pct}%</div>
+      </div>
+      <div class="small text-muted mt-1">
+        ${job.files_done} / ${job.files_total} files${job.files_skipped ? ` (${job.files_skipped} unchanged)` : ""} &middot;
+        ${job.rows_total} rows &middot; ${job.rows_delta ?? 0} delta rows &middot; ${job.rows_per_sec} rows/s
+      </div>${errors}`;
+  }
+
+  function renderResults(job) {
+    if (job.status === "failed" && !job.results.length) {
+      const error = job.errors.map((e) => e.error).join("; ") || "Import failed.";
+      result.innerHTML = `<div class="alert alert-danger shadow rounded-3">${error}</div>`;
+      return;
+    }
+    result.innerHTML = job.results
+      .map((r) => {
+        if (r.status === "skipped") {
+          return `<div class="alert alert-secondary shadow rounded-3">⏭️ ${r.file}: unchanged, skipped</div>`;
+        }
+        if (r.status === "ok") {
+          const delta = r.delta_rows < r.rows ? `, ${r.delta_rows} newer than stored data` : "";
+          return `<div class="alert alert-success shadow rounded-3">✅ ${r.file}: ${r.inserted} of ${r.rows} rows imported (${r.skipped} already present${delta})</div>`;
+        }
+        return `<div class="alert alert-danger shadow rounded-3">❌ ${r.file}: ${r.error}</div>`;
+      })
+      .join("");
+    clearFileInput();
+  }
+
+  // Streams job progress over SSE, falling back to polling if the stream drops.
+  function followJob(job) {
+    return new Promise((resolve) => {
+      const done = (state) => ["done", "failed"].includes(state.status);
+      const poll = async () => {
+        const state = await (await fetch(job.status_url)).json();
+        renderProgress(state);
+        if (done(state)) resolve(state);
+        else setTimeout(poll, 1000);
+      };
+      if (!window.EventSource) {
+        poll();
+        return;
+      }
+      const events = new EventSource(job.events_url);
+      events.onmessage = (e) => {
+        const state = JSON.parse(e.data);
+        renderProgress(state);
+        if (done(state)) {
+          events.close();
+          resolve(state);
+        }
+      };
+      events.onerror = () => {
+        events.close();
+        poll();
+      };
+    });
+  }
+
   // Handle upload
   const form = document.getElementById("uploadForm");
   if (form) {
@@ -103,20 +209,17 @@ document.addEventListener("DOMContentLoaded", function () {
         json = { error: "Upload failed. Try again." };
       }
 
-      uploadBtn.disabled = false;
-      btnText.textContent = "Upload";
-      spinner.classList.add("d-none");
-
-      if (json.results) {
-        result.innerHTML = json.results
-          .map((r) =>
-            r.status === "ok"
-              ? `<div class="alert alert-success shadow rounded-3">✅ ${r.file}: ${r.rows} rows imported</div>`
-              : `<div class="alert alert-danger shadow rounded-3">❌ ${r.file}: ${r.error}</div>`
-          )
-          .join("");
-        clearFileInput();
-      } else if (res?.ok) {
+      if (res?.status === 202 && json.job_id) {
+        btnText.textContent = "Importing...";
+        renderProgress({ status: "queued", files_done: 0, files_total: json.files, rows_total: 0, rows_per_sec: 0, errors: [] });
+        const job = await followJob(json);
+        finishUpload();
+        renderResults(job);
+        return;
+      }
+
+      finishUpload();
+      if (res?.ok) {
         result.innerHTML = `<div class="alert alert-success shadow rounded-3">${json.message}</div>`;
       } else {
         result.innerHTML = `<div class="alert alert-danger shadow rounded-3">${json.error || "Unknown error."}</div>`;
@@ -0,0 +1,80 @@
+# Times a dashboard's worth of chart specs (overlapping ranges and ticker
+# subsets, several averages) as separate /chart-data requests against one
+# /chart-data/batch request, with the response cache cleared before each run.
+# Loads synthetic labels with insert_data and deletes them afterwards.
+#   python -m benchmarks.bench_chart_batch --tickers 6 --days 5000
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.main.cache import get_chart_cache
+from app.main.utils import insert_data
+from benchmarks.bench_insert import delete_labels, synthetic_frame
+
+
+def median_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def dashboard_specs(labels):
+    specs = []
+    for avg in (5, 20, 50):
+        specs.append({"stock": labels, "type": "line", "avg": avg, "format": "columnar", "max_points": 2000})
+        for label in labels[:2]:
+            specs.append({"stock": label, "type": "candlestick", "avg": avg, "include": True,
+                          "start": "2020-01-01", "format": "columnar"})
+    specs.append({"stock": labels[-3:], "type": "line", "start": "2022-01-01", "end": "2024-12-31"})
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=6)
+    parser.add_argument('--days', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["LOGIN_DISABLED"] = True
+    client = app.test_client()
+    labels = [f"BENCHBAT{i}" for i in range(args.tickers)]
+    specs = dashboard_specs(labels)
+    with app.app_context():
+        delete_labels(labels)
+        try:
+            for seed, label in enumerate(labels):
+                insert_data(synthetic_frame(args.days, seed), f"{label}_bench")
+            print(f"{len(specs)} specs over {args.tickers} labels x {args.days:,} days")
+
+            def separate():
+                get_chart_cache().clear()
+                for spec in specs:
+                    query = {k: ",".join(v) if isinstance(v, list) else ("1" if v is True else v)
+                             for k, v in spec.items()}
+                    assert client.get('/chart-data', query_string=query).status_code == 200
+
+            def batch():
+                get_chart_cache().clear()
+                response = client.post('/chart-data/batch', json={"specs": specs})
+                assert all(r["status"] == 200 for r in response.get_json()["results"])
+
+            timings = {}
+            for workers in (1, app.config["CHART_BATCH_WORKERS"]):
+                app.config["CHART_BATCH_WORKERS"] = workers
+                timings[f"batch, {workers} thread(s)"] = median_time(batch, args.repeat)
+            timings = {"separate requests": median_time(separate, args.repeat), **timings}
+            base = timings["separate requests"]
+            for name, seconds in timings.items():
+                print(f"{name:>20}: {seconds * 1000:8.1f}ms ({base / seconds:4.1f}x)")
+        finally:
+            delete_labels(labels)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# Measures the /chart-data read path on large ranges: latency and peak Python
+# memory (tracemalloc) of loading the price frame the old way (read_sql_query
+# with NUMERIC -> Decimal objects) against the typed paths
+# (float typecaster, and COPY -> CSV -> read_csv), plus end-to-end requests.
+# Loads synthetic labels with insert_data and deletes them afterwards.
+#   python -m benchmarks.bench_chart_read --tickers 20 --days 5000
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import pandas as pd
+from psycopg2.extensions import DECIMAL, register_type
+
+from app import create_app
+from app.db import get_engine
+from app.main.cache import get_chart_cache
+from app.main.charting import load_chart_frame
+from app.main.utils import insert_data
+from benchmarks.bench_insert import delete_labels, synthetic_frame
+
+QUERY = """
+    SELECT date, close_last{cast}, open{cast}, high{cast}, low{cast}, label
+    FROM stock_prices
+    WHERE label = ANY(%s)
+    ORDER BY date ASC
+"""
+
+
+def decimal_frame(labels):
+    # The original path: NUMERIC columns arrive as Decimal objects, which
+    # read_sql_query then coerces to float. The cast reproduces that on a
+    # migrated (DOUBLE PRECISION) table, and the per-connection typecaster
+    # overrides the app-wide float one.
+    with get_engine().connect() as conn:
+        register_type(DECIMAL, conn.connection.dbapi_connection)
+        df = pd.read_sql_query(QUERY.format(cast="::numeric"), con=conn, params=(labels,))
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df
+
+
+def float_frame(labels):
+    df = pd.read_sql_query(QUERY.format(cast=""), con=get_engine(), params=(labels,))
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df
+
+
+def copy_frame(labels):
+    return load_chart_frame(labels, None, None)
+
+
+def rolling(df):
+    # The per-stock work that follows every load.
+    for _, group in df.groupby("label"):
+        group["close_last"].rolling(20).mean()
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    labels = [f"BENCHREAD{i}" for i in range(args.tickers)]
+    with app.app_context():
+        delete_labels(labels)
+        try:
+            for seed, label in enumerate(labels):
+                insert_data(synthetic_frame(args.days, seed), f"{label}_bench")
+            rows = args.tickers * args.days
+            print(f"{rows:,} rows across {args.tickers} labels")
+            for name, load in (('read_sql, Decimal', decimal_frame), ('read_sql, float', float_frame),
+                               ('COPY -> read_csv', copy_frame)):
+                elapsed, peak = measure(lambda: rolling(load(labels)), args.repeat)
+                print(f"{name:>18}: {elapsed * 1000:7.0f}ms load+rolling, peak {peak / 2**20:6.1f} MiB")
+
+            app.config["LOGIN_DISABLED"] = True
+            client = app.test_client()
+            for fmt in ('plotly', 'columnar'):
+                def request():
+                    get_chart_cache().clear()
+                    response = client.get(f"/chart-data?stock={','.join(labels)}&type=line&avg=20&format={fmt}")
+                    assert response.status_code == 200, response.status_code
+                elapsed, peak = measure(request, args.repeat)
+                print(f"/chart-data {fmt:>8}: {elapsed * 1000:7.0f}ms, peak {peak / 2**20:6.1f} MiB")
+        finally:
+            delete_labels(labels)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Compares chart reads from Postgres with reads sliced from the memory-mapped
+# column store (warm, i.e. after the first read populated it): the
+# load_chart_frame step alone and whole /chart-data requests with the
+# response cache cleared, for full histories and a one-year range. Loads
+# synthetic labels with insert_data and deletes them afterwards.
+#   python -m benchmarks.bench_column_store --tickers 5 --days 5000
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from app.main.cache import get_chart_cache
+from app.main.charting import load_chart_frame
+from app.main.column_store import ColumnStore
+from app.main.utils import insert_data
+from benchmarks.bench_insert import delete_labels, synthetic_frame
+
+
+def median_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=5)
+    parser.add_argument('--days', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["LOGIN_DISABLED"] = True
+    client = app.test_client()
+    labels = [f"BENCHCOL{i}" for i in range(args.tickers)]
+    root = tempfile.mkdtemp(prefix='column-store-')
+    cases = {
+        'full history': (None, None),
+        'one year': ('2024-01-01', '2024-12-31'),
+    }
+    with app.app_context():
+        delete_labels(labels)
+        try:
+            for seed, label in enumerate(labels):
+                insert_data(synthetic_frame(args.days, seed), f"{label}_bench")
+            print(f"{args.tickers} labels x {args.days:,} days")
+            for case, (start, end) in cases.items():
+                query = f"/chart-data?stock={','.join(labels)}&type=line&avg=20&format=columnar"
+                query += f"&start={start}&end={end}" if start else ""
+
+                def request():
+                    get_chart_cache().clear()
+                    assert client.get(query).status_code == 200
+
+                timings = {}
+                for source, store in (('postgres', None), ('column store', ColumnStore(root, 1024 ** 3))):
+                    app.extensions['column_store'] = store
+                    request()
+                    timings[source] = (median_time(lambda: load_chart_frame(labels, start, end), args.repeat),
+                                       median_time(request, args.repeat))
+                (sql_frame, sql_request), (store_frame, store_request) = timings.values()
+                print(f"{case:>13}: frame {sql_frame * 1000:7.1f}ms -> {store_frame * 1000:6.1f}ms "
+                      f"({sql_frame / store_frame:4.1f}x), /chart-data {sql_request * 1000:7.1f}ms -> "
+                      f"{store_request * 1000:6.1f}ms ({sql_request / store_request:4.1f}x)")
+        finally:
+            app.extensions['column_store'] = None
+            delete_labels(labels)
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
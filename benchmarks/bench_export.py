@@ -0,0 +1,73 @@
+# Measures /export/prices throughput (rows/s), response size and peak Python
+# memory (tracemalloc) per format, consuming each response chunk by chunk the
+# way a client download would, against pulling the same labels through
+# /chart-data (columnar). Also times the /export/search.csv stream. Loads
+# synthetic labels with insert_data and deletes them afterwards.
+#   python -m benchmarks.bench_export --tickers 20 --days 5000
+import argparse
+import time
+import tracemalloc
+
+from app import create_app
+from app.main.cache import get_chart_cache
+from app.main.utils import insert_data
+from benchmarks.bench_insert import delete_labels, synthetic_frame
+
+
+def download(client, url):
+    get_chart_cache().clear()
+    response = client.get(url, buffered=False)
+    assert response.status_code == 200, (url, response.status_code)
+    size = 0
+    try:
+        for chunk in response.iter_encoded():
+            size += len(chunk)
+    finally:
+        response.close()
+    return size
+
+
+def measure(client, url):
+    started = time.perf_counter()
+    size = download(client, url)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    download(client, url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["LOGIN_DISABLED"] = True
+    client = app.test_client()
+    labels = [f"BENCHEXP{i}" for i in range(args.tickers)]
+    stock = ','.join(labels)
+    with app.app_context():
+        delete_labels(labels)
+        try:
+            for seed, label in enumerate(labels):
+                insert_data(synthetic_frame(args.days, seed), f"{label}_bench")
+            rows = args.tickers * args.days
+            print(f"{rows:,} rows across {args.tickers} labels, "
+                  f"chunks of {app.config['EXPORT_CHUNK_ROWS']:,} rows")
+            urls = {f"export {fmt}": f"/export/prices?stock={stock}&format={fmt}"
+                    for fmt in ('arrow', 'parquet', 'csv')}
+            urls['search csv'] = "/export/search.csv?search=label:~BENCHEXP"
+            urls['chart-data'] = f"/chart-data?stock={stock}&type=line&format=columnar"
+            for name, url in urls.items():
+                elapsed, size, peak = measure(client, url)
+                print(f"{name:>15}: {rows / elapsed:10,.0f} rows/s, {size / 2**20:7.1f} MiB, "
+                      f"peak {peak / 2**20:6.1f} MiB")
+        finally:
+            delete_labels(labels)
+
+
+if __name__ == '__main__':
+    main()
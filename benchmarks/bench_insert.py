@@ -0,0 +1,83 @@
+# Compares the COPY-based insert_data against the old row-by-row INSERT loop.
+# Needs a reachable Postgres (see .env); run from the repo root:
+#   python -m benchmarks.bench_insert --tickers 20 --days 2500
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.utils import insert_data
+
+
+def legacy_insert_data(df, file_name):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for _, row in df.iterrows():
+                cur.execute("""
+                    INSERT INTO stock_prices
+                    (date, close_last, volume, open, high, low, label)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (date, label) DO NOTHING;
+                """, (
+                    row['Date'], row['Close/Last'], row['Volume'],
+                    row['Open'], row['High'], row['Low'],
+                    file_name.split('_')[0].upper()
+                ))
+        conn.commit()
+
+
+def synthetic_frame(days, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    spread = np.abs(rng.normal(0, 0.01, days)) * close
+    return pd.DataFrame({
+        'Date': pd.bdate_range(end='2025-07-02', periods=days),
+        'Close/Last': close.round(4),
+        'Volume': rng.integers(1_000_000, 90_000_000, days),
+        'Open': (close + rng.normal(0, 0.5, days)).round(4),
+        'High': (close + spread).round(4),
+        'Low': (close - spread).round(4),
+    })
+
+
+def delete_labels(labels):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM stock_prices WHERE label = ANY(%s)", (labels,))
+            cur.execute("DELETE FROM stock_indicators WHERE label = ANY(%s)", (labels,))
+            cur.execute("DELETE FROM tickers WHERE label = ANY(%s)", (labels,))
+        conn.commit()
+
+
+def run(loader, prefix, frames):
+    labels = [f"{prefix}{i}" for i in range(len(frames))]
+    delete_labels(labels)
+    started = time.perf_counter()
+    for label, df in zip(labels, frames):
+        loader(df, f"{label}_bench")
+    elapsed = time.perf_counter() - started
+    delete_labels(labels)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--days', type=int, default=2520)
+    args = parser.parse_args()
+
+    frames = [synthetic_frame(args.days, seed) for seed in range(args.tickers)]
+    rows = args.tickers * args.days
+
+    app = create_app()
+    with app.app_context():
+        for name, loader in (('row-by-row', legacy_insert_data), ('copy', insert_data)):
+            elapsed = run(loader, f"BENCH{name[0].upper()}", frames)
+            print(f"{name:>10}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
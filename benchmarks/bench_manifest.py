@@ -0,0 +1,71 @@
+# Times the daily re-import of a folder: the first load, a re-run over the
+# same files (skipped by the ingest manifest), a re-run after each export grew
+# by a few new days (delta rows only), and the same re-run with force=True,
+# which is what every re-run cost before the manifest. Labels and manifest
+# rows are deleted afterwards.
+#   python -m benchmarks.bench_manifest --files 50 --rows 5000
+import argparse
+import os
+import tempfile
+import time
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.ingest import ingest_files
+from benchmarks.bench_insert import delete_labels
+from benchmarks.datagen import write_nasdaq_csv
+
+
+def clear(labels):
+    delete_labels(labels)
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM ingest_manifest WHERE label = ANY(%s)", (labels,))
+        conn.commit()
+
+
+def run(name, paths, **kwargs):
+    started = time.perf_counter()
+    results = ingest_files(paths, **kwargs)
+    elapsed = time.perf_counter() - started
+    skipped = sum(r['status'] == 'skipped' for r in results)
+    delta = sum(r.get('delta_rows', 0) for r in results)
+    inserted = sum(r.get('inserted', 0) for r in results)
+    print(f"{name:>18}: {elapsed:6.2f}s, {skipped} files skipped, {delta:,} delta rows, {inserted:,} inserted")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--new-days', type=int, default=5)
+    args = parser.parse_args()
+
+    labels = [f"BENCHMAN{i}" for i in range(args.files)]
+    with create_app().app_context(), tempfile.TemporaryDirectory() as tmp:
+        paths, lines = [], []
+        for seed, label in enumerate(labels):
+            path = os.path.join(tmp, f"{label}_data.csv")
+            write_nasdaq_csv(path, args.rows, seed)
+            with open(path) as f:
+                lines.append(f.readlines())
+            # Yesterday's export: the newest days are not there yet.
+            with open(path, 'w') as f:
+                f.writelines(lines[-1][:1] + lines[-1][1 + args.new_days:])
+            paths.append(path)
+        print(f"{args.files} files x {args.rows:,} rows")
+        clear(labels)
+        try:
+            run('first load', paths)
+            run('unchanged re-run', paths)
+            for path, content in zip(paths, lines):
+                with open(path, 'w') as f:
+                    f.writelines(content)
+            run('grown re-run', paths)
+            run('forced re-run', paths, force=True)
+        finally:
+            clear(labels)
+
+
+if __name__ == '__main__':
+    main()
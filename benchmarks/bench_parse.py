@@ -0,0 +1,75 @@
+# Compares the original whole-file parse_csv (read + decode the upload, regex
+# clean-up of every price column) with the chunked parse_csv_stream on large
+# synthetic Nasdaq-format files: latency and peak Python memory
+# (tracemalloc); tests/test_parse.py checks both parse the same values. With
+# --db the streamed chunks are also loaded through insert_batches (needs
+# Postgres; rows are deleted afterwards).
+#   python -m benchmarks.bench_parse --rows 2000000 --db
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app
+from app.main.utils import PARSE_CHUNK_ROWS, insert_batches, parse_csv_stream
+from benchmarks.bench_insert import delete_labels
+from benchmarks.datagen import write_nasdaq_csv
+from tests.legacy import legacy_parse
+
+
+def stream_parse(path):
+    rows = 0
+    for df in parse_csv_stream(path):
+        rows += len(df)
+    return rows
+
+
+def measure(fn, path):
+    started = time.perf_counter()
+    fn(path)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def load_db(path, label):
+    # Each load starts from an empty label so both measure() runs insert.
+    inserted = []
+
+    def load(path):
+        try:
+            inserted.append(insert_batches(parse_csv_stream(path), f"{label}_bench")[0])
+        finally:
+            delete_labels([label])
+
+    with create_app().app_context():
+        delete_labels([label])
+        elapsed, peak = measure(load, path)
+    print(f"{'stream -> DB':>14}: {elapsed:6.2f}s, peak {peak / 2**20:7.1f} MiB, {inserted[0]:,} rows inserted")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--comma-volume', action='store_true')
+    parser.add_argument('--db', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'BENCHPARSE_data.csv')
+        write_nasdaq_csv(path, args.rows, comma_volume=args.comma_volume)
+        print(f"{args.rows:,} rows, {os.path.getsize(path) / 2**20:.0f} MiB on disk, "
+              f"chunks of {PARSE_CHUNK_ROWS:,} rows")
+        for name, fn in (('whole file', legacy_parse), ('stream', stream_parse)):
+            elapsed, peak = measure(fn, path)
+            print(f"{name:>14}: {elapsed:6.2f}s, peak {peak / 2**20:7.1f} MiB")
+        if args.db:
+            load_db(path, 'BENCHPARSE')
+
+
+if __name__ == '__main__':
+    main()
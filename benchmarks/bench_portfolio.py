@@ -0,0 +1,77 @@
+# Times a full-universe portfolio backtest: the old /chart-data shape (filter
+# the frame per stock, then average and signals one stock after another)
+# against build_portfolio (group once, stocks batched over the process pool,
+# sleeves combined into one equity curve). Also checks that every stock's
+# sleeve compounds to its ledger's cumulative return. No database needed.
+#   python -m benchmarks.bench_portfolio --tickers 2000 --days 2520
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.main.portfolio import backtest_stock, build_portfolio, position_returns, run_backtests
+from app.main.signals import signal_actions
+from app.main.sweep import series_from_frame
+from app.main.trades import TradeLedger
+from benchmarks.bench_sweep import synthetic_series
+
+
+def long_frame(series, dates):
+    return pd.DataFrame({
+        'label': np.repeat(list(series), len(dates)),
+        'date': np.tile(dates.to_numpy(), len(series)),
+        'close_last': np.concatenate([close for _, close in series.values()]),
+    })
+
+
+def serial_backtest(df, stocks, window):
+    summaries = []
+    for stock in stocks:
+        s_df = df[df['label'] == stock].copy()
+        close = s_df['close_last'].to_numpy(dtype=float)
+        s_df['avg'] = s_df['close_last'].rolling(window=window).mean()
+        ledger = TradeLedger(stock, s_df['date'].to_numpy(dtype='datetime64[D]'), close,
+                             signal_actions(close, s_df['avg'].to_numpy(dtype=float)))
+        summaries.append((ledger.summary(), position_returns(ledger)))
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=2520)
+    parser.add_argument('--window', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--serial-tickers', type=int, default=200,
+                        help='tickers timed on the serial path (extrapolated)')
+    args = parser.parse_args()
+
+    series, dates = synthetic_series(args.tickers, args.days)
+    df = long_frame(series, dates)
+    print(f"{args.tickers} tickers x {args.days:,} days ({len(df):,} rows)")
+
+    run_backtests(dict(list(series.items())[:8]), args.window, True, workers=args.workers)  # warm the pool
+    started = time.perf_counter()
+    portfolio = build_portfolio(series_from_frame(df), args.window, True, workers=args.workers)
+    parallel = time.perf_counter() - started
+    print(f"build_portfolio: {parallel:.2f}s, total return {portfolio['stats']['total_return']}%, "
+          f"max drawdown {portfolio['stats']['max_drawdown']}%")
+
+    subset = list(series)[:args.serial_tickers]
+    started = time.perf_counter()
+    serial_backtest(df, subset, args.window)
+    serial = (time.perf_counter() - started) / len(subset) * args.tickers
+    print(f"serial, filtered per stock: ~{serial:.2f}s for {args.tickers} ({serial / parallel:.1f}x slower)")
+
+    mismatched = 0
+    for stock in subset:
+        days, close = series[stock]
+        summary, returns = backtest_stock(stock, days, close, args.window, True)
+        if not np.isclose((np.prod(1 + returns) - 1) * 100, summary['cumulative_return'], atol=0.01):
+            mismatched += 1
+    print(f"sleeve vs ledger on {len(subset)} stocks: {mismatched} mismatched")
+
+
+if __name__ == '__main__':
+    main()
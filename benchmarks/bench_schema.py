@@ -0,0 +1,162 @@
+# Compares the original single-heap stock_prices layout with the partitioned
+# one from db/init.sql on the same synthetic data. Each layout is built in its
+# own scratch schema (dropped afterwards), loaded label by label like file
+# ingestion does, vacuumed, and then timed on the queries the app issues.
+#   python -m benchmarks.bench_schema --tickers 500 --years 10
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.db import get_engine
+from app.main.utils import grid_page_query
+
+HEAP_LAYOUT = """
+    CREATE TABLE stock_prices (
+        id SERIAL PRIMARY KEY,
+        date DATE NOT NULL,
+        close_last NUMERIC,
+        volume BIGINT,
+        open NUMERIC,
+        high NUMERIC,
+        low NUMERIC,
+        label VARCHAR(128) NOT NULL,
+        UNIQUE (date, label)
+    );
+    CREATE INDEX ON stock_prices (label);
+    CREATE INDEX ON stock_prices (date);
+"""
+
+PARTITIONED_LAYOUT = """
+    CREATE TABLE stock_prices (
+        date DATE NOT NULL,
+        close_last DOUBLE PRECISION,
+        volume BIGINT,
+        open DOUBLE PRECISION,
+        high DOUBLE PRECISION,
+        low DOUBLE PRECISION,
+        label VARCHAR(128) NOT NULL,
+        PRIMARY KEY (label, date) INCLUDE (close_last, open, high, low)
+    ) PARTITION BY RANGE (date);
+    CREATE TABLE stock_prices_default PARTITION OF stock_prices DEFAULT;
+    CREATE INDEX ON stock_prices (date, label);
+    CREATE INDEX ON stock_prices USING brin (date);
+"""
+
+LAYOUTS = {'heap': HEAP_LAYOUT, 'partitioned': PARTITIONED_LAYOUT}
+
+
+def chart_query(labels, start, end):
+    # Same shape as charting.load_chart_frame.
+    return ("SELECT date, close_last, open, high, low, label FROM stock_prices "
+            "WHERE label = ANY(%s) AND date BETWEEN %s AND %s ORDER BY date ASC", [labels, start, end])
+
+
+def queries(first_year, last_year):
+    mid = (first_year + last_year) // 2
+    grid_first = grid_page_query("", [], 'date', 'desc', 0, 20)
+    grid_keyset = grid_page_query("", [], 'date', 'desc', 0, 20, after=(f"{mid}-06-14", "T0"))
+    return {
+        'chart: 1 label, full history': chart_query(['T1'], f"{first_year}-01-01", f"{last_year}-12-31"),
+        'chart: 3 labels, 2 years': chart_query(['T1', 'T2', 'T3'], f"{mid}-01-01", f"{mid + 1}-12-31"),
+        'chart: all labels, 1 month': ("SELECT date, close_last, open, high, low, label FROM stock_prices "
+                                       "WHERE date BETWEEN %s AND %s ORDER BY date ASC",
+                                       [f"{mid}-03-01", f"{mid}-03-31"]),
+        'search: date:YYYY count': ("SELECT COUNT(*) FROM stock_prices WHERE date >= %s AND date < %s",
+                                    [f"{mid}-01-01", f"{mid + 1}-01-01"]),
+        'grid: first page by date': grid_first,
+        'grid: keyset page by date': grid_keyset,
+    }
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def build(cur, schema, layout, tickers, first_year, last_year, load_order):
+    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}; SET search_path TO {schema}")
+    cur.execute(LAYOUTS[layout])
+    if layout == 'partitioned':
+        for year in range(first_year, last_year + 1):
+            cur.execute(f"CREATE TABLE stock_prices_{year} PARTITION OF stock_prices "
+                        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+    # "label": one label's full history at a time, as file ingestion loads
+    # it; "date": all labels day by day, as daily appends would.
+    batches = ([(t, t, first_year, last_year) for t in range(tickers)] if load_order == 'label'
+               else [(0, tickers - 1, year, year) for year in range(first_year, last_year + 1)])
+    started = time.perf_counter()
+    for first_ticker, last_ticker, start_year, end_year in batches:
+        cur.execute("""
+            INSERT INTO stock_prices (date, close_last, volume, open, high, low, label)
+            SELECT d, p, (random() * 1e7)::bigint, p * 0.99, p * 1.01, p * 0.98, 'T' || t
+            FROM (
+                SELECT d::date, t, round((50 + random() * 100)::numeric, 2) AS p
+                FROM generate_series(%s, %s) t, generate_series(%s::date, %s::date, interval '1 day') d
+                WHERE EXTRACT(ISODOW FROM d) < 6
+            ) rows
+            ORDER BY d, t
+        """, (first_ticker, last_ticker, f"{start_year}-01-01", f"{end_year}-12-31"))
+    return time.perf_counter() - started
+
+
+def relation_size(cur):
+    # pg_partition_tree returns nothing for a plain table.
+    cur.execute("""
+        SELECT pg_size_pretty(COALESCE(SUM(pg_total_relation_size(relid)),
+                                       pg_total_relation_size('stock_prices')))
+        FROM pg_partition_tree('stock_prices'::regclass)
+        WHERE isleaf
+    """)
+    return cur.fetchone()[0]
+
+
+def time_query(cur, sql, params, repeat):
+    cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = cur.fetchone()[0][0]['Plan']
+    scans = sorted({node['Node Type'] for node in plan_nodes(plan) if 'Scan' in node['Node Type']})
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), scans
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--last-year', type=int, default=2024)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--load-order', choices=('label', 'date'), default='label')
+    args = parser.parse_args()
+    first_year = args.last_year - args.years + 1
+
+    app = create_app()
+    results = {}
+    # Autocommit, since VACUUM cannot run inside a transaction.
+    with app.app_context(), get_engine().execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+        with conn.connection.cursor() as cur:
+            for layout in LAYOUTS:
+                schema = f"bench_{layout}"
+                try:
+                    load = build(cur, schema, layout, args.tickers, first_year, args.last_year,
+                                 args.load_order)
+                    cur.execute("VACUUM ANALYZE stock_prices")
+                    print(f"{layout}: loaded in {load:.1f}s, {relation_size(cur)} with indexes")
+                    for name, (sql, params) in queries(first_year, args.last_year).items():
+                        results[name, layout] = time_query(cur, sql, params, args.repeat)
+                finally:
+                    cur.execute(f"RESET search_path; DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+    for name in queries(first_year, args.last_year):
+        (heap, heap_scans), (part, part_scans) = results[name, 'heap'], results[name, 'partitioned']
+        print(f"{name:30} heap {heap * 1000:8.1f}ms  partitioned {part * 1000:8.1f}ms  ({heap / part:4.1f}x)")
+        print(f"{'':30} {', '.join(heap_scans)}  ->  {', '.join(part_scans)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# Load test: the Flask development server (one threaded process, as
+# `python run.py` ran it) against gunicorn with gunicorn.conf.py, both
+# serving a mix of /chart-data (random tickers and averages), /tickers and
+# /table-data from concurrent clients. The response cache is disabled so
+# every request does its work. Loads synthetic labels and a benchmark user,
+# and deletes both afterwards.
+#   python -m benchmarks.bench_serving --concurrency 1,8,32 --seconds 10
+import argparse
+import http.cookiejar
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.utils import insert_data
+from benchmarks.bench_insert import delete_labels, synthetic_frame
+
+USERNAME = 'bench-serving'
+PASSWORD = 'bench-serving'
+
+
+def server_commands(port, workers, threads):
+    return {
+        'dev server': [sys.executable, '-m', 'flask', '--app', 'run', 'run', '--port', str(port), '--no-reload',
+                       '--no-debugger'],
+        f'gunicorn {workers}x{threads}': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app',
+                                          '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                                          '--threads', str(threads)],
+    }
+
+
+def opener(base):
+    jar = http.cookiejar.CookieJar()
+    client = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    form = urllib.parse.urlencode({'username': USERNAME, 'password': PASSWORD}).encode()
+    client.open(f'{base}/login', form, timeout=30).read()
+    if not any(cookie.name == 'session' for cookie in jar):
+        raise RuntimeError('login failed')
+    return client
+
+
+def wait_ready(base, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with {process.returncode}')
+        try:
+            urllib.request.urlopen(f'{base}/login', timeout=2).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.25)
+    raise RuntimeError('server did not start')
+
+
+def request_mix(labels, rng):
+    roll = rng.random()
+    if roll < 0.7:
+        query = {'stock': ','.join(rng.sample(labels, rng.randint(1, 3))), 'type': rng.choice(['line', 'candlestick']),
+                 'avg': rng.choice([5, 20, 50, 100, 200])}
+        return '/chart-data?' + urllib.parse.urlencode(query)
+    if roll < 0.85:
+        return '/tickers'
+    query = {'search': f'label:{rng.choice(labels)} and close_last:>50', 'length': 100}
+    return '/table-data?' + urllib.parse.urlencode(query)
+
+
+def load(base, labels, concurrency, seconds):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = opener(base)
+        while time.monotonic() < deadline:
+            path = request_mix(labels, rng)
+            started = time.perf_counter()
+            try:
+                session.open(base + path, timeout=120).read()
+            except (urllib.error.URLError, ConnectionError) as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else float('nan')
+    return len(latencies) / elapsed, statistics.median(latencies) if latencies else float('nan'), p95, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--days', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5077)
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(',')]
+    labels = [f'BENCHSRV{i}' for i in range(args.tickers)]
+    base = f'http://127.0.0.1:{args.port}'
+    env = {**os.environ, 'CHART_CACHE_TTL': '0', 'GUNICORN_ACCESS_LOG': ''}
+
+    app = create_app()
+    with app.app_context():
+        delete_labels(labels)
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM users WHERE username = %s", (USERNAME,))
+                cur.execute("INSERT INTO users (username, password_hash) VALUES (%s, %s)",
+                            (USERNAME, generate_password_hash(PASSWORD)))
+            conn.commit()
+        try:
+            for seed, label in enumerate(labels):
+                insert_data(synthetic_frame(args.days, seed), f'{label}_bench')
+            print(f'{args.tickers} labels x {args.days:,} days, {os.cpu_count()} CPU(s), {args.seconds:g}s per level')
+            for name, command in server_commands(args.port, args.workers, args.threads).items():
+                process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    wait_ready(base, process)
+                    for concurrency in levels:
+                        rate, p50, p95, errors = load(base, labels, concurrency, args.seconds)
+                        print(f'{name:>16} c={concurrency:<3} {rate:7.1f} req/s  p50 {p50 * 1000:7.1f}ms  '
+                              f'p95 {p95 * 1000:7.1f}ms  errors {errors}')
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait(timeout=180)
+        finally:
+            delete_labels(labels)
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM users WHERE username = %s", (USERNAME,))
+                conn.commit()
+
+
+if __name__ == '__main__':
+    main()
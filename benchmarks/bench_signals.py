@@ -0,0 +1,32 @@
+# Times the vectorized generate_suggestions against the original iterrows
+# implementation (tests/legacy.py), which tests/test_signals.py checks it
+# against.
+#   python -m benchmarks.bench_signals --sizes 1000,10000,50000
+import argparse
+import time
+
+import numpy as np
+
+from app.main.utils import generate_suggestions
+from tests.legacy import legacy_generate_suggestions, random_frame
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    for n in [int(x) for x in args.sizes.split(',')]:
+        df = random_frame(rng, n)
+        timings = {}
+        for name, fn in (('iterrows', legacy_generate_suggestions), ('vectorized', generate_suggestions)):
+            started = time.perf_counter()
+            fn(df.copy())
+            timings[name] = time.perf_counter() - started
+        print(f"n={n:>7}: iterrows {timings['iterrows']:.3f}s, vectorized {timings['vectorized']:.4f}s "
+              f"({timings['iterrows'] / timings['vectorized']:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Times the moving-average sweep engine against looping the per-request chart
+# path (rolling mean + generate_suggestions + analyze_trades) over windows.
+# No database needed; series are synthetic random walks.
+#   python -m benchmarks.bench_sweep --tickers 100 --days 2520 --windows 2-250
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.main.sweep import parse_windows, run_sweep
+from app.main.utils import generate_suggestions
+from tests.legacy import analyze_trades, clean_suggestions_keep_last_as_sell
+
+
+def synthetic_series(tickers, days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2025-07-02', periods=days)
+    day_numbers = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return {
+        f"T{i}": (day_numbers, np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.015, days))), 2))
+        for i in range(tickers)
+    }, dates
+
+
+def legacy_sweep(series, dates, windows, modes):
+    rows = []
+    for stock, (_, close) in series.items():
+        for mode in modes:
+            for window in windows:
+                s_df = pd.DataFrame({'date': dates, 'close_last': close})
+                s_df['date_str'] = s_df['date'].dt.strftime('%Y-%m-%d')
+                base = s_df['close_last'] if mode == 'include' else s_df['close_last'].shift(1)
+                s_df['avg'] = base.rolling(window=window).mean()
+                suggestions = [dict(stock=stock, **s) for s in generate_suggestions(s_df)]
+                if suggestions:
+                    trades = analyze_trades(clean_suggestions_keep_last_as_sell(suggestions))
+                    rows.append((stock, window, mode, len(trades), round(sum(t['pnl_pct'] for t in trades), 1)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--days', type=int, default=2520)
+    parser.add_argument('--windows', default='2-250')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--legacy-tickers', type=int, default=2,
+                        help='tickers timed on the per-request path (extrapolated)')
+    args = parser.parse_args()
+
+    windows = parse_windows(args.windows, 10_000)
+    modes = ['include', 'exclude']
+    series, dates = synthetic_series(args.tickers, args.days)
+    combos = args.tickers * len(windows) * len(modes)
+
+    run_sweep({'T0': series['T0']}, windows[:2], modes, workers=args.workers)  # warm the pool
+    started = time.perf_counter()
+    rows = run_sweep(series, windows, modes, workers=args.workers)
+    engine = time.perf_counter() - started
+    print(f"sweep engine: {combos} combinations in {engine:.2f}s ({combos / engine:,.0f}/s)")
+
+    subset = dict(list(series.items())[:args.legacy_tickers])
+    started = time.perf_counter()
+    legacy = legacy_sweep(subset, dates, windows, modes)
+    per_ticker = (time.perf_counter() - started) / len(subset)
+    print(f"per-request path: {per_ticker:.2f}s per ticker, ~{per_ticker * args.tickers:.0f}s for {args.tickers}"
+          f" ({per_ticker * args.tickers / engine:.0f}x slower)")
+
+    engine_rows = {(r['stock'], r['window'], r['mode']): (r['trades'], round(r['total_return'], 1))
+                   for r in rows if r['stock'] in subset}
+    mismatched = [row for row in legacy if abs(engine_rows[row[:3]][1] - row[4]) > 0.05 * max(1, row[3])
+                  or engine_rows[row[:3]][0] != row[3]]
+    print(f"cross-check on {len(legacy)} combinations: {len(mismatched)} mismatched")
+
+
+if __name__ == '__main__':
+    main()
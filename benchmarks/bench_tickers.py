@@ -0,0 +1,84 @@
+# Times what /charts needs to list tickers: the original
+# SELECT DISTINCT label over stock_prices, a read of the tickers table, and
+# the whole page served from the in-process cache. Synthetic labels are
+# generated straight into stock_prices (then registered with
+# rebuild_tickers) and deleted afterwards.
+#   python -m benchmarks.bench_tickers --tickers 500 --years 10
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.tickers import get_tickers, load_tickers, rebuild_tickers
+from benchmarks.bench_insert import delete_labels
+
+PREFIX = "BENCHTK"
+
+
+def median_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def distinct_labels():
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT label FROM stock_prices ORDER BY label")
+            return cur.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["LOGIN_DISABLED"] = True
+    client = app.test_client()
+    labels = [f"{PREFIX}{i}" for i in range(args.tickers)]
+    with app.app_context():
+        delete_labels(labels)
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO stock_prices (date, close_last, volume, open, high, low, label)
+                        SELECT d::date, 100, 1000000, 100, 101, 99, %s || t
+                        FROM generate_series(0, %s - 1) t,
+                             generate_series(CURRENT_DATE - make_interval(years => %s), CURRENT_DATE, '1 day') d
+                        WHERE EXTRACT(ISODOW FROM d) < 6
+                    """, (PREFIX, args.tickers, args.years))
+                    rows = cur.rowcount
+                    rebuild_tickers(cur, labels)
+                    cur.execute("ANALYZE stock_prices")
+                conn.commit()
+            print(f"{rows:,} synthetic rows across {args.tickers} labels")
+
+            def page():
+                assert client.get('/charts').status_code == 200
+
+            def cold_page():
+                app.extensions['ticker_cache'].invalidate()
+                page()
+
+            for name, fn in (('SELECT DISTINCT label', distinct_labels), ('tickers table', load_tickers),
+                             ('/charts, cache miss', cold_page), ('/charts, cached', page)):
+                get_tickers()
+                print(f"{name:>22}: {median_time(fn, args.repeat) * 1000:8.2f}ms")
+        finally:
+            delete_labels(labels)
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    rebuild_tickers(cur, labels)
+                conn.commit()
+
+
+if __name__ == '__main__':
+    main()
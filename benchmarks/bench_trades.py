@@ -0,0 +1,38 @@
+# Times TradeLedger against the original suggestion-list trade analysis
+# (tests/legacy.py), which tests/test_trades.py checks it against.
+#   python -m benchmarks.bench_trades --sizes 1000,10000,50000
+import argparse
+import time
+
+import numpy as np
+
+from app.main.signals import signal_actions
+from app.main.trades import TradeLedger, decision_summary
+from tests.legacy import finite_frame, legacy_analysis
+
+
+def ledger_analysis(df, stock='T'):
+    actions = signal_actions(df['close_last'].to_numpy(dtype=float), df['avg'].to_numpy(dtype=float))
+    ledger = TradeLedger.from_frame(stock, df, actions)
+    return decision_summary([ledger]), ledger.trade_table()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    for n in [int(x) for x in args.sizes.split(',')]:
+        df = finite_frame(rng, n)
+        timings = {}
+        for name, fn in (('suggestion lists', legacy_analysis), ('ledger', ledger_analysis)):
+            started = time.perf_counter()
+            fn(df.copy())
+            timings[name] = time.perf_counter() - started
+        print(f"n={n:>7}: suggestion lists {timings['suggestion lists']:.3f}s, ledger {timings['ledger']:.4f}s "
+              f"({timings['suggestion lists'] / timings['ledger']:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Prints the SQL parse_search generates for typical searches and checks with
+# EXPLAIN that each one can be answered from an index. Sequential scans are
+# disabled for the session, so a Seq Scan in the plan means no index applies.
+# The generated SQL itself is asserted in tests/test_search.py.
+#   python -m benchmarks.check_search_plans
+import sys
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.utils import parse_search
+
+SEARCHES = [
+    ('label:AAPL', True),
+    ('label:=aapl', True),
+    ('label:~APL', True),
+    ('Visa', True),
+    ('date:2024-05-01', True),
+    ('date:2024-05', True),
+    ('date:2023', True),
+    ('date:>=2023-01-01', True),
+    ('date:2023-01..2023-06', True),
+    ('2024-06', True),
+    ('label:AAPL and date:2024', True),
+    ('05-01', False),  # partial date text: still a textual match
+]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context(), get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SET enable_seqscan = off")
+            for search, expect_index in SEARCHES:
+                where_clause, params = parse_search(search)
+                query = f"SELECT * FROM stock_prices {where_clause}"
+                cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                plan = cur.fetchone()[0][0]['Plan']
+                scans = sorted({node['Node Type'] for node in plan_nodes(plan) if 'Scan' in node['Node Type']})
+                indexed = 'Seq Scan' not in scans
+                ok = indexed or not expect_index
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {search!r:32} {where_clause} {params}")
+                print(f"     scans: {', '.join(scans)}")
+        conn.rollback()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Synthetic Nasdaq historical-quotes CSVs, one file per ticker named like the
+# real downloads (<TICKER>_data.csv, newest day first, "$" prices, "12,345"
+# volumes), for benchmarks and local testing.
+#   python -m benchmarks.datagen /tmp/market --tickers 50 --years 10
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def write_nasdaq_csv(path, rows, seed=0, comma_volume=False, start_price=900.0):
+    # Newest day first, "$" prices (thousands separated once prices pass
+    # 1,000) and optionally "12,345,678" volumes, like the Nasdaq
+    # historical-quotes export. Dates cycle through ~50 years so any row count
+    # fits the calendar. Written in blocks to keep memory flat.
+    rng = np.random.default_rng(seed)
+    calendar = pd.bdate_range(end='2025-07-02', periods=13_000)[::-1].strftime('%m/%d/%Y')
+    price = start_price
+    money = lambda values: [f'${v:,.2f}' for v in values]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Date,Close/Last,Volume,Open,High,Low\n')
+        for start in range(0, rows, 100_000):
+            n = min(100_000, rows - start)
+            close = price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+            price = close[-1]
+            spread = np.abs(rng.normal(0, 0.01, n)) * close
+            volume = rng.integers(1_000_000, 90_000_000, n)
+            frame = pd.DataFrame({
+                'Date': calendar[np.arange(start, start + n) % len(calendar)],
+                'Close/Last': money(close),
+                'Volume': [f'{v:,}' for v in volume] if comma_volume else volume,
+                'Open': money(close + rng.normal(0, 0.5, n)),
+                'High': money(close + spread),
+                'Low': money(close - spread),
+            })
+            frame.to_csv(f, index=False, header=False)
+
+
+def write_market(directory, tickers, years, seed=0, prefix='SYN'):
+    # One file per ticker with `years` of trading days each; labels are
+    # <prefix>0, <prefix>1, ... Returns the file paths.
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i, start_price in enumerate(np.round(np.exp(rng.uniform(np.log(5), np.log(2000), tickers)), 2)):
+        path = os.path.join(directory, f'{prefix}{i}_data.csv')
+        write_nasdaq_csv(path, years * TRADING_DAYS, seed=seed + i, comma_volume=True, start_price=start_price)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory')
+    parser.add_argument('--tickers', type=int, default=50)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='SYN')
+    args = parser.parse_args()
+
+    paths = write_market(args.directory, args.tickers, args.years, args.seed, args.prefix)
+    print(f"Wrote {len(paths)} files x {args.years * TRADING_DAYS:,} rows to {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
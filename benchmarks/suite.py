@@ -0,0 +1,243 @@
+# Reproducible benchmark run over synthetic Nasdaq-format data (datagen) at
+# several scales, saved as JSON so runs can be compared:
+#   parse_csv, insert_data, parse_search (through /table-data), /chart-data
+#   end to end, generate_suggestions and analyze_trades (TradeLedger).
+# Against the compose database:
+#   docker compose up -d stocks_db
+#   POSTGRES_PORT=55432 python -m benchmarks.suite --scales small,medium
+#   python -m benchmarks.suite --compare benchmarks/results/a.json benchmarks/results/b.json
+# --no-db runs only the benchmarks that need no database. Synthetic labels
+# (BENCHSUITE*) are deleted afterwards.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+from app import create_app
+from app.db import get_db_connection
+from app.main.cache import get_chart_cache
+from app.main.signals import signal_actions
+from app.main.trades import TradeLedger
+from app.main.utils import extract_file_base_name, file_label, generate_suggestions, insert_data, parse_csv
+from benchmarks.bench_insert import delete_labels
+from benchmarks.datagen import TRADING_DAYS, write_market
+
+PREFIX = 'BENCHSUITE'
+# name -> (tickers, years of trading days per ticker)
+SCALES = {
+    'small': (5, 2),
+    'medium': (20, 10),
+    'large': (100, 20),
+}
+SEARCHES = [
+    'label:{label}',
+    'label:{label} and date:2024',
+    'close_last:>100 and date:>2020-01-01',
+    'volume:>50000000',
+]
+PACKAGES = ('flask', 'pandas', 'numpy', 'psycopg2-binary', 'sqlalchemy', 'plotly', 'orjson', 'pyarrow')
+
+
+def run_times(fn, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def result(name, scale, timings, rows=None, **params):
+    seconds = statistics.median(timings)
+    entry = {'name': name, 'scale': scale, 'params': params, 'seconds': round(seconds, 6),
+             'runs': [round(t, 6) for t in timings]}
+    if rows is not None:
+        entry['rows'] = rows
+        entry['rows_per_sec'] = round(rows / seconds, 1) if seconds else None
+    return entry
+
+
+def signal_frames(frames):
+    # Per label: the parsed rows oldest first with a 20-day average, shaped
+    # like the chart path's per-stock frames.
+    out = {}
+    for label, df in frames.items():
+        s_df = df.rename(columns={'Date': 'date', 'Close/Last': 'close_last'}).iloc[::-1].reset_index(drop=True)
+        s_df['date_str'] = s_df['date'].dt.strftime('%Y-%m-%d')
+        s_df['avg'] = s_df['close_last'].rolling(window=20).mean()
+        out[label] = s_df
+    return out
+
+
+def analyze_trades(s_frames):
+    for label, s_df in s_frames.items():
+        actions = signal_actions(s_df['close_last'].to_numpy(dtype=float), s_df['avg'].to_numpy(dtype=float))
+        ledger = TradeLedger.from_frame(label, s_df, actions)
+        ledger.trade_table()
+        ledger.summary()
+
+
+def run_scale(client, scale, tickers, years, repeat, use_db):
+    results = []
+    rows = tickers * years * TRADING_DAYS
+    with tempfile.TemporaryDirectory(prefix='bench-suite-') as directory:
+        paths = write_market(directory, tickers, years, prefix=f'{PREFIX}{scale.upper()}')
+        contents = {}
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                contents[extract_file_base_name(path)] = f.read()
+    labels = [file_label(name) for name in contents]
+
+    frames = {}
+
+    def parse_all():
+        for name, content in contents.items():
+            frames[file_label(name)] = parse_csv(content)
+    results.append(result('parse_csv', scale, run_times(parse_all, repeat), rows))
+
+    s_frames = signal_frames(frames)
+    results.append(result('generate_suggestions', scale, run_times(
+        lambda: [generate_suggestions(s_df) for s_df in s_frames.values()], repeat), rows))
+    results.append(result('analyze_trades', scale, run_times(lambda: analyze_trades(s_frames), repeat), rows))
+
+    if not use_db:
+        return results
+    try:
+        def insert_all():
+            for name in contents:
+                insert_data(frames[file_label(name)], name)
+        results.append(result('insert_data', scale, run_times(insert_all, repeat, lambda: delete_labels(labels)),
+                              rows))
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("ANALYZE stock_prices")
+            conn.commit()
+
+        for search in SEARCHES:
+            search = search.format(label=labels[0])
+
+            def table_page():
+                assert client.get('/table-data', query_string={'search': search, 'length': 100}).status_code == 200
+            results.append(result('parse_search', scale, run_times(table_page, repeat), search=search))
+
+        chart_specs = {
+            'one ticker, line, avg 20': {'stock': labels[0], 'type': 'line', 'avg': 20},
+            'five tickers, candlestick, avg 50': {'stock': ','.join(labels[:5]), 'type': 'candlestick',
+                                                  'avg': 50, 'include': 1},
+            'all tickers, columnar, 1000 points': {'stock': ','.join(labels), 'type': 'line', 'avg': 20,
+                                                   'format': 'columnar', 'max_points': 1000},
+        }
+        for case, query in chart_specs.items():
+            def chart():
+                assert client.get('/chart-data', query_string=query).status_code == 200
+            timings = run_times(chart, repeat, get_chart_cache().clear)
+            results.append(result('chart_data', scale, timings, case=case))
+    finally:
+        delete_labels(labels)
+    return results
+
+
+def metadata(use_db):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    packages = {}
+    for package in PACKAGES:
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'packages': packages,
+    }
+    if use_db:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SHOW server_version")
+                meta['postgres'] = cur.fetchone()[0]
+    return meta
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    key = lambda r: (r['name'], r['scale'], json.dumps(r['params'], sort_keys=True))
+    baseline = {key(r): r for r in old['results']}
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    regressions = 0
+    for r in new['results']:
+        before = baseline.get(key(r))
+        if before is None:
+            continue
+        ratio = r['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        params = ', '.join(str(v) for v in r['params'].values())
+        print(f"{r['name']:>20} {r['scale']:>6} {params[:40]:<40} {before['seconds'] * 1000:10.1f}ms -> "
+              f"{r['seconds'] * 1000:10.1f}ms ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', default='small,medium', help=f"comma list of {', '.join(SCALES)}")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-db', action='store_true')
+    parser.add_argument('--out', help='results file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change flagged by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        raise SystemExit(1 if compare(*args.compare, args.threshold) else 0)
+
+    scales = [s.strip() for s in args.scales.split(',') if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    app = create_app()
+    app.config['LOGIN_DISABLED'] = True
+    client = app.test_client()
+    with app.app_context():
+        meta = metadata(not args.no_db)
+        results = []
+        for scale in scales:
+            tickers, years = SCALES[scale]
+            print(f"{scale}: {tickers} tickers x {years} years")
+            for entry in run_scale(client, scale, tickers, years, args.repeat, not args.no_db):
+                params = ', '.join(str(v) for v in entry['params'].values())
+                print(f"  {entry['name']:>20} {params[:40]:<40} {entry['seconds'] * 1000:10.1f}ms")
+                results.append(entry)
+
+    out = args.out or os.path.join(os.path.dirname(__file__), 'results',
+                                   f"{meta['timestamp'][:19].replace(':', '')}-{meta['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({'meta': meta, 'scales': {s: SCALES[s] for s in scales}, 'results': results}, f, indent=2)
+    print(f"Saved {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,38 @@
+-- Prices are range-partitioned by year. (label, date) is the natural key; its
+-- index carries the OHLC columns so chart reads can be index-only scans.
 CREATE TABLE IF NOT EXISTS stock_prices (
-    id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
-    close_last NUMERIC,
+    close_last DOUBLE PRECISION,
     volume BIGINT,
-    open NUMERIC,
-    high NUMERIC,
-    low NUMERIC,
+    open DOUBLE PRECISION,
+    high DOUBLE PRECISION,
+    low DOUBLE PRECISION,
     label VARCHAR(128) NOT NULL,
-    UNIQUE (date, label)
-);
+    CONSTRAINT stock_prices_label_date_pkey PRIMARY KEY (label, date) INCLUDE (close_last, open, high, low)
+) PARTITION BY RANGE (date);
+CREATE TABLE IF NOT EXISTS stock_prices_default PARTITION OF stock_prices DEFAULT;
+
+-- Adds the partition for one calendar year, moving any rows for it out of the
+-- default partition first. Run it ahead of loading data for a new year.
+CREATE OR REPLACE FUNCTION stock_prices_add_year(year integer) RETURNS void AS $$
+DECLARE
+    part text := format('stock_prices_%s', year);
+    lo date := make_date(year, 1, 1);
+    hi date := make_date(year + 1, 1, 1);
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE stock_prices INCLUDING DEFAULTS)', part);
+    EXECUTE format('WITH moved AS (DELETE FROM stock_prices_default WHERE date >= %L AND date < %L RETURNING *) '
+                   'INSERT INTO %I SELECT * FROM moved', lo, hi, part);
+    EXECUTE format('ALTER TABLE stock_prices ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+END
+$$ LANGUAGE plpgsql;
+
+SELECT stock_prices_add_year(year::integer)
+FROM generate_series(2000, EXTRACT(YEAR FROM CURRENT_DATE)::integer + 1) AS year;
+
 DO $$
 BEGIN
   IF NOT EXISTS (SELECT FROM pg_tables WHERE tablename = 'users') THEN
@@ -22,5 +46,44 @@ CREATE TABLE IF NOT EXISTS users (
 END
 $$;
 
-CREATE INDEX IF NOT EXISTS idx_stock_prices_label ON stock_prices (label);
-CREATE INDEX IF NOT EXISTS idx_stock_prices_date ON stock_prices (date);
\ No newline at end of file
+-- (date, label) serves the index grid's date-ordered keyset paging; the BRIN
+-- index keeps wide date-range scans across all labels cheap.
+CREATE INDEX IF NOT EXISTS idx_stock_prices_date_label ON stock_prices (date, label);
+CREATE INDEX IF NOT EXISTS idx_stock_prices_date_brin ON stock_prices USING brin (date);
+
+-- Substring label search (ILIKE '%...%') is served by a trigram index.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_stock_prices_label_trgm ON stock_prices USING gin (label gin_trgm_ops);
+
+-- Rolling averages of close_last, refreshed by ingestion (app/main/indicators.py).
+CREATE TABLE IF NOT EXISTS stock_indicators (
+    label VARCHAR(128) NOT NULL,
+    window_days INTEGER NOT NULL,
+    date DATE NOT NULL,
+    avg_incl DOUBLE PRECISION,
+    avg_excl DOUBLE PRECISION,
+    PRIMARY KEY (label, window_days, date)
+);
+
+-- Files already ingested (app/main/manifest.py): unchanged files are skipped,
+-- changed ones only load rows after the label's latest stored date.
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    path TEXT PRIMARY KEY,
+    label VARCHAR(128) NOT NULL,
+    size BIGINT NOT NULL,
+    mtime DOUBLE PRECISION NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    max_date DATE,
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_manifest_label_sha256 ON ingest_manifest (label, sha256);
+
+-- One row per label with its date range and row count, maintained by
+-- ingestion (app/main/tickers.py) so /charts never scans stock_prices.
+CREATE TABLE IF NOT EXISTS tickers (
+    label VARCHAR(128) PRIMARY KEY,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    row_count BIGINT NOT NULL,
+    last_ingested TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,4 @@
+-- Brings an existing database in line with init.sql: trigram index for
+-- substring label search. Safe to re-run.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_stock_prices_label_trgm ON stock_prices USING gin (label gin_trgm_ops);
@@ -0,0 +1,12 @@
+-- Precomputed rolling averages of close_last per label (see
+-- app/main/indicators.py). Fill it once after migrating with
+--   flask --app run rebuild-indicators
+-- ingestion keeps it current afterwards. Safe to re-run.
+CREATE TABLE IF NOT EXISTS stock_indicators (
+    label VARCHAR(128) NOT NULL,
+    window_days INTEGER NOT NULL,
+    date DATE NOT NULL,
+    avg_incl DOUBLE PRECISION,
+    avg_excl DOUBLE PRECISION,
+    PRIMARY KEY (label, window_days, date)
+);
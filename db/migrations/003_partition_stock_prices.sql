@@ -0,0 +1,60 @@
+-- Rebuilds stock_prices as the year-partitioned table from init.sql and copies
+-- every row across. The old table is locked for the whole migration, so run
+-- it in a maintenance window; afterwards run
+--   VACUUM ANALYZE stock_prices;
+-- so the visibility map allows index-only scans. The unused surrogate id
+-- column is dropped; (label, date) is the primary key.
+BEGIN;
+
+LOCK TABLE stock_prices IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE stock_prices RENAME TO stock_prices_heap;
+
+CREATE TABLE stock_prices (
+    date DATE NOT NULL,
+    close_last NUMERIC,
+    volume BIGINT,
+    open NUMERIC,
+    high NUMERIC,
+    low NUMERIC,
+    label VARCHAR(128) NOT NULL,
+    CONSTRAINT stock_prices_label_date_pkey PRIMARY KEY (label, date) INCLUDE (close_last, open, high, low)
+) PARTITION BY RANGE (date);
+CREATE TABLE stock_prices_default PARTITION OF stock_prices DEFAULT;
+
+CREATE OR REPLACE FUNCTION stock_prices_add_year(year integer) RETURNS void AS $$
+DECLARE
+    part text := format('stock_prices_%s', year);
+    lo date := make_date(year, 1, 1);
+    hi date := make_date(year + 1, 1, 1);
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE stock_prices INCLUDING DEFAULTS)', part);
+    EXECUTE format('WITH moved AS (DELETE FROM stock_prices_default WHERE date >= %L AND date < %L RETURNING *) '
+                   'INSERT INTO %I SELECT * FROM moved', lo, hi, part);
+    EXECUTE format('ALTER TABLE stock_prices ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+END
+$$ LANGUAGE plpgsql;
+
+-- One partition per year present in the data, through next year.
+SELECT stock_prices_add_year(year::integer)
+FROM generate_series(
+    LEAST((SELECT EXTRACT(YEAR FROM MIN(date)) FROM stock_prices_heap), 2000),
+    EXTRACT(YEAR FROM CURRENT_DATE) + 1
+) AS year;
+
+-- Secondary indexes are built after the copy rather than maintained row by row.
+INSERT INTO stock_prices (date, close_last, volume, open, high, low, label)
+SELECT date, close_last, volume, open, high, low, label
+FROM stock_prices_heap
+ORDER BY label, date;
+
+DROP TABLE stock_prices_heap;
+
+CREATE INDEX idx_stock_prices_date_label ON stock_prices (date, label);
+CREATE INDEX idx_stock_prices_date_brin ON stock_prices USING brin (date);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_stock_prices_label_trgm ON stock_prices USING gin (label gin_trgm_ops);
+
+COMMIT;
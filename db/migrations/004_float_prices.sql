@@ -0,0 +1,10 @@
+-- Stores prices as DOUBLE PRECISION instead of unbounded NUMERIC. Reads then
+-- come back as float64 without Decimal conversion, and the covering primary
+-- key shrinks. Nasdaq quotes carry at most four decimals, which doubles
+-- represent to well beyond display precision. Rewrites every partition and
+-- its indexes under an exclusive lock; safe to re-run.
+ALTER TABLE stock_prices
+    ALTER COLUMN close_last TYPE DOUBLE PRECISION,
+    ALTER COLUMN open TYPE DOUBLE PRECISION,
+    ALTER COLUMN high TYPE DOUBLE PRECISION,
+    ALTER COLUMN low TYPE DOUBLE PRECISION;
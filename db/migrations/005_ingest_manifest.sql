@@ -0,0 +1,12 @@
+-- Ingest manifest (see app/main/manifest.py). Files ingested before it exists
+-- are treated as new once, then tracked. Safe to re-run.
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    path TEXT PRIMARY KEY,
+    label VARCHAR(128) NOT NULL,
+    size BIGINT NOT NULL,
+    mtime DOUBLE PRECISION NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    max_date DATE,
+    ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_manifest_label_sha256 ON ingest_manifest (label, sha256);
@@ -0,0 +1,20 @@
+-- Ticker metadata (see app/main/tickers.py), filled from the existing rows.
+-- Ingestion keeps it current afterwards; after deleting rows by hand run
+--   flask --app run rebuild-tickers
+-- Safe to re-run.
+CREATE TABLE IF NOT EXISTS tickers (
+    label VARCHAR(128) PRIMARY KEY,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    row_count BIGINT NOT NULL,
+    last_ingested TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO tickers (label, first_date, last_date, row_count, last_ingested)
+SELECT label, MIN(date), MAX(date), COUNT(*), now()
+FROM stock_prices
+GROUP BY label
+ON CONFLICT (label) DO UPDATE SET
+    first_date = EXCLUDED.first_date,
+    last_date = EXCLUDED.last_date,
+    row_count = EXCLUDED.row_count;
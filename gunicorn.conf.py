@@ -0,0 +1,75 @@
+# Production serving: gunicorn -c gunicorn.conf.py run:app
+# Each worker is a process with GUNICORN_THREADS request threads, its own DB
+# pool (up to PG_POOL_SIZE + PG_POOL_MAX_OVERFLOW connections, plus one for the
+# SQLAlchemy engine), its own sweep process pool and its own in-process caches
+# and metrics.
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+load_dotenv()  # so .env settings win over the defaults derived below
+
+cpus = multiprocessing.cpu_count()
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+# All workers together stay within PG_CONNECTION_BUDGET Postgres connections
+# (default 80, leaving headroom under the server's max_connections=100 for
+# psql, migrations and scripts). The default worker count is capped so each
+# worker gets at least one connection per thread, and unless PG_POOL_SIZE /
+# PG_POOL_MAX_OVERFLOW are set the budget is split evenly between workers.
+# Pools wait for a free connection rather than fail (PG_POOL_TIMEOUT).
+connection_budget = int(os.environ.get("PG_CONNECTION_BUDGET", 80))
+workers = int(os.environ.get("WEB_CONCURRENCY", max(1, min(cpus * 2 + 1, connection_budget // (threads + 1)))))
+pool_connections = max(1, connection_budget // workers - 1)
+os.environ.setdefault("PG_POOL_SIZE", str(min(5, pool_connections)))
+os.environ.setdefault("PG_POOL_MAX_OVERFLOW", str(pool_connections - min(5, pool_connections)))
+
+# Sweeps and portfolio backtests share the host's CPUs between workers
+# instead of every worker starting a pool of cpu_count processes.
+os.environ.setdefault("SWEEP_WORKERS", str(max(1, cpus // workers)))
+
+# The app is imported once in the master and forked, so pandas, numpy and
+# plotly pages are shared copy-on-write instead of loaded per worker.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# GUNICORN_MAX_REQUESTS > 0 replaces workers after a jittered number of
+# requests to bound slow leaks. Off by default: a recycled worker gives its
+# running ingestion jobs only half of graceful_timeout (see worker_exit), so
+# a long import would be cut short. Large uploads and full-history charts
+# need a generous timeout.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 120))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+# Without preload every worker builds its own app after forking, and
+# there is nothing to hand over.
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        from app.db import close_db
+        close_db(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app.db import reset_db_after_fork
+        from app.main.jobs import job_queue
+        reset_db_after_fork(server.app.wsgi())
+        job_queue.after_fork()
+
+
+# Running ingestion jobs get half of graceful_timeout to finish. Any still
+# running are marked failed and the worker exits without them rather than
+# blocking until the arbiter kills it. Jobs of a worker that was killed
+# outright are failed by its replacement when it starts (JobQueue.reconcile).
+def worker_exit(server, worker):
+    from app.main.jobs import job_queue
+    if job_queue.executor is not None and not job_queue.shutdown(timeout=server.cfg.graceful_timeout / 2):
+        os._exit(1)
@@ -0,0 +1,166 @@
+# The implementations the vectorized code replaced, kept as references for
+# the equivalence tests and the benchmarks that time against them.
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.main.utils import generate_suggestions, safe_float
+
+
+def legacy_generate_suggestions(df, price_col='close_last', avg_col='avg'):
+    if avg_col not in df or df[avg_col].isna().all():
+        return []
+
+    df['avg_prev'] = df[avg_col].shift(1)
+    df['avg_gradient'] = df[avg_col] - df['avg_prev']
+    df['diff'] = df[price_col] - df[avg_col]
+    df['crossing'] = df['diff'] * df['diff'].shift(1) < 0
+
+    suggestions = []
+    last_action = "Nothing"
+    long_position = False
+    for idx, row in df.iterrows():
+        date = str(row.get('date_str', row['date']))
+        price = safe_float(row[price_col])
+        avg = safe_float(row[avg_col])
+        gradient = row['avg_gradient']
+        crossing = row['crossing']
+        diff = row['diff']
+
+        action = "Nothing"
+        if not long_position and crossing:
+            if gradient > 0 and diff > 0:
+                action = "Long"
+                long_position = True
+            elif gradient < 0 and diff < 0:
+                action = "Short"
+                long_position = True
+        elif long_position and last_action == "Long" and crossing:
+            if gradient > 0 and diff < 0 or gradient > 0 and diff > 0:
+                action = "Sell"
+                long_position = False
+            elif gradient < 0 and diff < 0:
+                action = "Short"
+        elif long_position and last_action == "Short" and crossing:
+            if gradient > 0 and diff > 0:
+                action = "Long"
+                long_position = True
+            elif gradient > 0 and diff < 0 or gradient < 0 and diff > 0:
+                action = "Sell"
+                long_position = False
+
+        if action in ["Long", "Short", "Sell"]:
+            last_action = action
+
+        suggestions.append({"date": date, "price": price, "avg": avg, "action": action})
+    return suggestions
+
+
+def random_frame(rng, n, with_date_str=True):
+    # Random walks with rounded prices (so exact ties and flat averages occur),
+    # occasional NaN/inf gaps, and either rolling-average variant.
+    close = np.round(100 + np.cumsum(rng.normal(0, rng.choice([0.1, 1, 5]), n)), rng.choice([0, 1, 2]))
+    if rng.random() < 0.3:
+        holes = rng.random(n) < 0.02
+        close[holes] = rng.choice([np.nan, np.inf, -np.inf], holes.sum())
+    df = pd.DataFrame({'date': pd.bdate_range('2000-01-03', periods=n), 'close_last': close})
+    if with_date_str:
+        df['date_str'] = df['date'].dt.strftime('%Y-%m-%d')
+    window = int(rng.integers(1, 30))
+    series = df['close_last'] if rng.random() < 0.5 else df['close_last'].shift(1)
+    df['avg'] = series.rolling(window=window).mean()
+    return df
+
+
+def finite_frame(rng, n):
+    df = random_frame(rng, n)
+    close = df['close_last']
+    return df[np.isfinite(close) & (close > 0)].reset_index(drop=True)
+
+
+def get_long_decision_summary(suggestions):
+    first_oper = next((s for s in suggestions if s['action'] in ["Long", "Short"]), None)
+    if not first_oper:
+        return None
+    last = suggestions[-1]
+    try:
+        percent_change = 100 * (last['price'] - first_oper['price']) / first_oper['price']
+    except Exception:
+        percent_change = None
+    return {
+        "first_operation_date": first_oper["date"],
+        "first_operation_price": first_oper["price"],
+        "last_operation_date": last["date"],
+        "last_operation_price": last["price"],
+        "percent_change": round(percent_change, 2) if percent_change is not None else None
+    }
+
+
+def clean_suggestions_keep_last_as_sell(suggestions):
+    if not suggestions:
+        return []
+    cleaned = [s for s in suggestions[:-1] if s['action'] != "Nothing"]
+    last = suggestions[-1].copy()
+    if last['action'] == "Nothing":
+        last['action'] = "Sell"
+    cleaned.append(last)
+    return cleaned
+
+
+def analyze_trades(suggestions):
+    trades = []
+    i = 0
+    while i < len(suggestions) - 1:
+        entry, exit = suggestions[i], suggestions[i+1]
+        if entry["action"] not in ["Long", "Short"] or exit["action"] != "Sell":
+            i += 1
+            continue
+
+        pnl_pct = 100 * (exit["price"] - entry["price"]) / entry["price"] if entry["action"] == "Long" else 100 * (entry["price"] - exit["price"]) / entry["price"]
+        pct = 100 * (exit["price"] / entry["price"]) if entry["action"] == "Long" else 100 * (entry["price"] / exit["price"])
+        holding_days = (datetime.strptime(exit["date"], "%Y-%m-%d") - datetime.strptime(entry["date"], "%Y-%m-%d")).days
+
+        trades.append({
+            "stock": entry["stock"],
+            "entry_action": entry["action"],
+            "entry_date": entry["date"],
+            "entry_price": entry["price"],
+            "exit_date": exit["date"],
+            "exit_price": exit["price"],
+            "pnl_pct": round(pnl_pct, 2),
+            "pnl_percentage": f"{round(pct, 2)}%",
+            "holding_days": holding_days
+        })
+        i += 2
+    return trades
+
+
+def legacy_cumulative(trades):
+    # main-charts.js addCumulativeColumn, which compounded the rounded percentages.
+    cumulative = 1
+    for trade in trades:
+        cumulative *= float(trade['pnl_percentage'].rstrip('%')) / 100
+        trade['cumulative_return'] = f"{cumulative * 100:.2f}%"
+    return trades
+
+
+def legacy_analysis(df, stock='T'):
+    suggestions = [dict(stock=stock, **s) for s in generate_suggestions(df)]
+    return (get_long_decision_summary(suggestions),
+            legacy_cumulative(analyze_trades(clean_suggestions_keep_last_as_sell(suggestions))))
+
+
+def legacy_parse_csv(content):
+    df = pd.read_csv(io.StringIO(content))
+    for col in ['Close/Last', 'Open', 'High', 'Low']:
+        df[col] = df[col].replace(r'[\$,]', '', regex=True).astype(float)
+    df['Volume'] = df['Volume'].replace(r'[,]', '', regex=True).astype(int)
+    df['Date'] = pd.to_datetime(df['Date'], format='%m/%d/%Y')
+    return df
+
+
+def legacy_parse(path):
+    with open(path, 'rb') as f:
+        return legacy_parse_csv(f.read().decode())
@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.main.utils import parse_csv, parse_csv_stream, parse_dates
+from benchmarks.datagen import write_nasdaq_csv
+from tests.legacy import legacy_parse, legacy_parse_csv
+
+
+@pytest.mark.parametrize("comma_volume", [False, True])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_stream_matches_whole_file_parse(tmp_path, seed, comma_volume):
+    # Several chunks, a short last one, and prices past 1,000 so the
+    # thousands separators are exercised.
+    path = tmp_path / 'TEST_data.csv'
+    write_nasdaq_csv(path, 2_345, seed=seed, comma_volume=comma_volume, start_price=990.0)
+    chunks = list(parse_csv_stream(path, chunksize=500))
+    assert [len(df) for df in chunks] == [500] * 4 + [345]
+    expected = legacy_parse(path)
+    assert (expected['Close/Last'] > 1000).any()
+    pd.testing.assert_frame_equal(expected, pd.concat(chunks, ignore_index=True), check_dtype=False)
+
+
+def test_parse_csv_matches_legacy():
+    content = ('Date,Close/Last,Volume,Open,High,Low\n'
+               '02/29/2024,"$1,234.50","1,000",$1.00,$2.00,$0.50\n'
+               '12/31/1999,$10.25,42,$10.00,$11.00,$9.00\n')
+    pd.testing.assert_frame_equal(legacy_parse_csv(content), parse_csv(content), check_dtype=False)
+
+
+@pytest.mark.parametrize("value", ['02/29/2024', '12/31/1969', '01/01/1900', '1/2/2024'])
+def test_dates_match_to_datetime(value):
+    # Shapes outside fixed-width MM/DD/YYYY fall back to to_datetime.
+    values = pd.Series(['01/02/2024', value])
+    pd.testing.assert_series_equal(parse_dates(values), pd.to_datetime(values, format='%m/%d/%Y'), check_dtype=False)
+
+
+@pytest.mark.parametrize("value", ['02/30/2023', '04/31/2024', '13/01/2024', '2024-01-02', '00/10/2024', '01/00/2024'])
+def test_invalid_dates_raise(value):
+    values = pd.Series(['01/02/2024', value])
+    with pytest.raises(ValueError):
+        pd.to_datetime(values, format='%m/%d/%Y')
+    with pytest.raises(ValueError):
+        parse_dates(values)
+
+
+def test_invalid_date_in_upload_raises():
+    with pytest.raises(ValueError):
+        parse_csv('Date,Close/Last,Volume,Open,High,Low\n02/30/2024,$1,1,$1,$1,$1\n')
+    with pytest.raises(ValueError):
+        list(parse_csv_stream(io.StringIO('Date,Close/Last,Volume,Open,High,Low\n02/30/2024,$1,1,$1,$1,$1\n')))
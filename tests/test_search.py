@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+from app.main.utils import parse_search
+
+
+@pytest.mark.parametrize("search, where, params", [
+    ("date:2024-05", "WHERE date >= %s AND date < %s", [date(2024, 5, 1), date(2024, 6, 1)]),
+    ("date:2024-12", "WHERE date >= %s AND date < %s", [date(2024, 12, 1), date(2025, 1, 1)]),
+    ("date:2024", "WHERE date >= %s AND date < %s", [date(2024, 1, 1), date(2025, 1, 1)]),
+    ("date:2024-05-03", "WHERE date = %s", [date(2024, 5, 3)]),
+    ("date:>2023-05", "WHERE date >= %s", [date(2023, 6, 1)]),
+    ("date:>=2023-05", "WHERE date >= %s", [date(2023, 5, 1)]),
+    ("date:<2023-05", "WHERE date < %s", [date(2023, 5, 1)]),
+    ("date:<=2023-05", "WHERE date < %s", [date(2023, 6, 1)]),
+    ("date:2023-01..2023-06", "WHERE date >= %s AND date < %s", [date(2023, 1, 1), date(2023, 7, 1)]),
+    ("date:2023-01..", "WHERE date >= %s", [date(2023, 1, 1)]),
+    ("2024-05", "WHERE date >= %s AND date < %s", [date(2024, 5, 1), date(2024, 6, 1)]),
+])
+def test_date_ranges(search, where, params):
+    assert parse_search(search) == (where, params)
+
+
+@pytest.mark.parametrize("search, where, params", [
+    ("label:AAPL", "WHERE label = %s", ["AAPL"]),
+    ("label:aapl", "WHERE label = %s", ["AAPL"]),
+    ("label:=BRK.B", "WHERE label = %s", ["BRK.B"]),
+    ("label:~ap", "WHERE label ILIKE %s", ["%ap%"]),
+    ("label:apple inc", "WHERE label ILIKE %s", ["%apple inc%"]),
+    ("Visa", "WHERE label ILIKE %s", ["%Visa%"]),
+])
+def test_labels(search, where, params):
+    assert parse_search(search) == (where, params)
+
+
+def test_invalid_dates_fall_back_to_text():
+    assert parse_search("date:2024-13") == ("WHERE CAST(date AS TEXT) ILIKE %s", ["%2024-13%"])
+    assert parse_search("date:2023-01..2023-13") == ("WHERE CAST(date AS TEXT) ILIKE %s", ["%2023-01..2023-13%"])
+    assert parse_search("2024-13") == ("WHERE (label ILIKE %s OR CAST(date AS TEXT) ILIKE %s)",
+                                       ["%2024-13%", "%2024-13%"])
+
+
+def test_combined_terms():
+    where, params = parse_search("label:AAPL and date:2024-05, close_last:>100")
+    assert where == "WHERE label = %s AND date >= %s AND date < %s AND close_last > %s"
+    assert params == ["AAPL", date(2024, 5, 1), date(2024, 6, 1), 100.0]
+
+
+def test_empty_search():
+    assert parse_search("") == ("", [])
+    assert parse_search("label:") == ("", [])
@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.main.signals import ACTION_NAMES, signal_actions
+from app.main.utils import generate_suggestions
+from tests.legacy import legacy_generate_suggestions, random_frame
+
+
+def frame(close, avg):
+    df = pd.DataFrame({'date': pd.bdate_range('2024-01-01', periods=len(close)),
+                       'close_last': np.asarray(close, dtype=float), 'avg': np.asarray(avg, dtype=float)})
+    df['date_str'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def assert_matches_legacy(df):
+    expected = legacy_generate_suggestions(df.copy())
+    assert json.dumps(generate_suggestions(df.copy())) == json.dumps(expected)
+    if expected:
+        actions = signal_actions(df['close_last'], df['avg'])
+        assert ACTION_NAMES[actions].tolist() == [row['action'] for row in expected]
+
+
+def test_random_series_match_legacy_loop():
+    # Random walks with rounded prices (exact ties, flat averages), NaN/inf
+    # gaps, both average modes and lengths from 0 up.
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(0, 400))
+        assert_matches_legacy(random_frame(rng, n, with_date_str=bool(rng.random() < 0.8)))
+
+
+@pytest.mark.parametrize("close, avg", [
+    ([10.0], [np.nan]),
+    ([10.0], [9.0]),
+    ([], []),
+    ([10, 11, 9, 12], [np.nan] * 4),
+    ([10, 11, 9, 12, 8, 13], [np.nan, np.nan, 10, 10.5, 10, 10.5]),
+    ([10, 12, 8, 12, 8], [10, 10, 10, 10, 10]),
+    ([9, 10, 11, 10, 9, 10, 11], [10, 10, 10.5, 10.5, 10, 10, 10.5]),
+    ([9, 11, np.nan, 9, 11, np.inf, 9], [10, 10.5, 11, 10, 10.5, 11, 10]),
+])
+def test_edge_cases_match_legacy_loop(close, avg):
+    assert_matches_legacy(frame(close, avg))
+
+
+def test_ties_are_not_crossings():
+    # close == avg on the middle row: the sign change goes through zero, which
+    # the strategy never treats as a crossing.
+    actions = signal_actions([9, 10, 11, 10, 9], [8, 10, 12, 10, 8])
+    assert ACTION_NAMES[actions].tolist() == ["Nothing"] * 5
+
+
+def test_single_row_has_no_signal():
+    assert signal_actions([10.0], [9.0]).tolist() == [0]
+    assert signal_actions([], []).tolist() == []
@@ -0,0 +1,36 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app.main import sweep
+from app.main.sweep import get_executor, parse_windows, run_sweep
+
+
+@pytest.mark.parametrize("text, windows", [
+    ("5,10,20", [5, 10, 20]),
+    ("2-6", [2, 3, 4, 5, 6]),
+    ("2-10:4", [2, 6, 10]),
+    ("0-3, 3, 1", [1, 2, 3]),
+    ("10,2-4,10", [10, 2, 3, 4]),
+])
+def test_parse_windows(text, windows):
+    assert parse_windows(text, 10) == windows
+
+
+@pytest.mark.parametrize("text", ["", "0", "2-10:0", "2-10:-1", "10-2", "a-b", "1-999999999999", "1-5,6-11"])
+def test_parse_windows_rejects(text):
+    with pytest.raises(ValueError):
+        parse_windows(text, 10)
+
+
+def test_broken_pool_is_replaced():
+    executor = get_executor(1)
+    executor.submit(os._exit, 1).exception()
+    series = {"T": (np.arange(30), np.linspace(10, 20, 30))}
+    with pytest.raises(BrokenProcessPool):
+        run_sweep(series, [5], ["include"], workers=1)
+    assert sweep._executor is None
+    assert len(run_sweep(series, [5], ["include"], workers=1)) == 1
+    assert get_executor(1) is not executor
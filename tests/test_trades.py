@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from app.main.charting import stock_series
+from app.main.signals import signal_actions
+from app.main.trades import TradeLedger, decision_summary
+from tests.legacy import finite_frame, legacy_analysis
+
+
+def ledger_for(df, stock='T'):
+    actions = signal_actions(df['close_last'].to_numpy(dtype=float), df['avg'].to_numpy(dtype=float))
+    return TradeLedger.from_frame(stock, df, actions)
+
+
+def test_ledger_matches_suggestion_list_analysis():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        df = finite_frame(rng, int(rng.integers(0, 400)))
+        expected_summary, expected = legacy_analysis(df)
+        ledger = ledger_for(df)
+        actual = ledger.trade_table()
+        assert decision_summary([ledger]) == expected_summary
+        assert len(actual) == len(expected)
+        for old, new in zip(expected, actual):
+            # The server compounds unrounded growth and the client compounded
+            # the rounded percentages, so the cumulative column drifts slightly.
+            old_cum, new_cum = float(old.pop('cumulative_return')[:-1]), float(new.pop('cumulative_return')[:-1])
+            assert abs(old_cum - new_cum) <= 1e-3 * max(1.0, abs(old_cum))
+            assert new == old
+
+
+def price_frame(label, close):
+    df = pd.DataFrame({'date': pd.bdate_range('2024-01-01', periods=len(close)),
+                       'close_last': np.asarray(close, dtype=float), 'label': label})
+    df['date_str'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def test_window_longer_than_history_has_no_ledger():
+    rng = np.random.default_rng(1)
+    groups = {'LONG': price_frame('LONG', 100 + np.cumsum(rng.normal(0, 1, 300))),
+              'SHORT': price_frame('SHORT', [10.0, 11.0, 9.0])}
+    series = {stock: (window, ledger) for stock, _, window, ledger in
+              stock_series(groups, ['LONG', 'SHORT'], 20, False)}
+    assert series['SHORT'] == (20, None)
+    assert series['LONG'][1] is not None
+
+    # The summary ends on the last stock that has suggestions, as before.
+    summary = decision_summary([series['LONG'][1]])
+    assert summary is None or summary['last_operation_date'] == groups['LONG']['date_str'].iloc[-1]
+
+
+def test_decision_summary_ignores_empty_ledgers():
+    rng = np.random.default_rng(2)
+    df = finite_frame(rng, 300)
+    ledger = ledger_for(df)
+    assert ledger.first_position() is not None
+    no_avg = TradeLedger('NOAVG', df['date'].to_numpy(dtype='datetime64[D]')[:5], df['close_last'][:5],
+                         np.zeros(5, dtype=np.int8))
+    no_rows = TradeLedger('NONE', [], [], [])
+    assert no_avg.empty and no_rows.empty and not ledger.empty
+    assert decision_summary([ledger, no_avg, no_rows]) == decision_summary([ledger])
+    assert decision_summary([no_avg, no_rows]) is None